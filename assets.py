@@ -0,0 +1,216 @@
+"""Pipeline aset gambar statis (palet makeup dan foto tim)
+
+Tiap gambar sumber diperkecil lalu disimpan ke cache berbasis isi
+(nama file = hash isinya) bersama manifest.json. Ada dua varian:
+
+    webp      untuk klien yang menerima image/webp (server.py /assets); lossless
+              untuk palet supaya warna swatch tidak bergeser
+    fallback  PNG atau JPEG, mana yang paling kecil (termasuk file asli);
+              dipakai st.image karena Streamlit mengonversi ulang format lain
+
+Build hanya mengulang gambar yang isinya berubah.
+
+Contoh:
+    python assets.py build
+    python assets.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / '.asset_cache'
+SCHEMA = 1
+# lebar maksimum: palet tampil di 3 kolom, foto tim selebar konten (2x untuk layar HiDPI)
+PALETTE_WIDTH = 480
+PHOTO_WIDTH = 720
+# warna latar .stApp di mainsec.py, untuk meratakan alpha saat menyimpan JPEG
+BACKGROUND = (0xFF, 0xF1, 0xF2)
+
+
+def default_sources(root=ROOT):
+    """Aset yang dipakai mainsec.py: {path relatif: jenis}"""
+    sources = {}
+    for label in ('FAIR', 'LIGHT', 'MEDIUM', 'DARK'):
+        for item in ('Blush', 'Foundation', 'Lipstick'):
+            path = f"images/{label}/{item}/{item}.png"
+            if (root / path).exists():
+                sources[path] = 'palette'
+    if (root / 'images/Teams.jpg').exists():
+        sources['images/Teams.jpg'] = 'photo'
+    return sources
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _encode(image, fmt, **params):
+    buf = BytesIO()
+    image.save(buf, format=fmt, **params)
+    return buf.getvalue()
+
+
+def _flatten(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        flat = Image.new('RGB', rgba.size, BACKGROUND)
+        flat.paste(rgba, mask=rgba.getchannel('A'))
+        return flat
+    return image.convert('RGB')
+
+
+def render_variants(data, kind):
+    """Kembalikan {varian: (format, bytes, (lebar, tinggi))} untuk satu gambar sumber"""
+    source = Image.open(BytesIO(data))
+    source_format = source.format
+    oriented = ImageOps.exif_transpose(source)
+    rotated = oriented is not source and oriented.size != source.size
+    image = _flatten(oriented)
+    max_width = PALETTE_WIDTH if kind == 'palette' else PHOTO_WIDTH
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+    if kind == 'palette':
+        webp = _encode(image, 'WEBP', lossless=True, method=6)
+    else:
+        webp = _encode(image, 'WEBP', quality=80, method=6)
+    candidates = [
+        ('PNG', _encode(image, 'PNG', optimize=True), image.size),
+        ('JPEG', _encode(image, 'JPEG', quality=85, optimize=True, progressive=True), image.size),
+    ]
+    if kind == 'palette':
+        # JPEG menggeser warna swatch, jadi palet hanya boleh PNG
+        candidates = candidates[:1]
+    if source_format in ('PNG', 'JPEG') and not rotated and (kind == 'photo' or source_format == 'PNG'):
+        candidates.append((source_format, data, source.size))
+    fallback = min(candidates, key=lambda c: len(c[1]))
+    return {'webp': ('WEBP', webp, image.size), 'fallback': fallback}
+
+
+def load_manifest(cache_dir=CACHE_DIR):
+    path = Path(cache_dir) / 'manifest.json'
+    if not path.exists():
+        return {'schema': SCHEMA, 'assets': {}}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('schema') == SCHEMA else {'schema': SCHEMA, 'assets': {}}
+
+
+def build(sources=None, cache_dir=CACHE_DIR, root=ROOT, force=False):
+    """Bangun aset yang belum ada atau sumbernya berubah; kembalikan (manifest, jumlah dibangun)"""
+    sources = default_sources(root) if sources is None else sources
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+    built = 0
+    for rel_path, kind in sources.items():
+        data = (Path(root) / rel_path).read_bytes()
+        source_hash = _digest(data)
+        entry = manifest['assets'].get(rel_path)
+        if (not force and entry and entry['source_hash'] == source_hash and entry['kind'] == kind
+                and all((cache_dir / v['file']).exists() for v in entry['variants'].values())):
+            continue
+        entry = {'kind': kind, 'source_hash': source_hash, 'source_bytes': len(data), 'variants': {}}
+        for name, (fmt, payload, (width, height)) in render_variants(data, kind).items():
+            filename = f"{_digest(payload)}.{fmt.lower().replace('jpeg', 'jpg')}"
+            target = cache_dir / filename
+            if not target.exists():
+                tmp = target.with_suffix('.tmp')
+                tmp.write_bytes(payload)
+                os.replace(tmp, target)
+            entry['variants'][name] = {'file': filename, 'format': fmt, 'bytes': len(payload),
+                                       'width': width, 'height': height}
+        manifest['assets'][rel_path] = entry
+        built += 1
+
+    if built:
+        tmp = cache_dir / 'manifest.json.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, cache_dir / 'manifest.json')
+    return manifest, built
+
+
+class AssetStore:
+    """Semua varian aset dimuat ke memori sekali, dicari berdasarkan path sumber"""
+    MIME = {'WEBP': 'image/webp', 'PNG': 'image/png', 'JPEG': 'image/jpeg'}
+
+    def __init__(self, manifest, cache_dir=CACHE_DIR):
+        self.manifest = manifest
+        self.files = {}
+        for entry in manifest['assets'].values():
+            for variant in entry['variants'].values():
+                if variant['file'] not in self.files:
+                    self.files[variant['file']] = (Path(cache_dir) / variant['file']).read_bytes()
+
+    @classmethod
+    def load(cls, cache_dir=CACHE_DIR, root=ROOT):
+        manifest, _ = build(cache_dir=cache_dir, root=root)
+        return cls(manifest, cache_dir)
+
+    def variant(self, path, name='fallback'):
+        """(bytes, format) untuk path sumber, atau None jika tidak ada di manifest"""
+        entry = self.manifest['assets'].get(path)
+        if entry is None:
+            return None
+        variant = entry['variants'][name]
+        return self.files[variant['file']], variant['format']
+
+    def image(self, path):
+        """Argumen untuk st.image: (bytes, output_format) atau (path asli, 'auto') sebagai cadangan"""
+        found = self.variant(path)
+        return found if found is not None else (path, 'auto')
+
+    def file(self, filename):
+        """(bytes, mime) untuk nama file berbasis hash, dipakai server.py"""
+        data = self.files.get(filename)
+        if data is None:
+            return None
+        fmt = 'JPEG' if filename.endswith('.jpg') else filename.rsplit('.', 1)[-1].upper()
+        return data, self.MIME.get(fmt, 'application/octet-stream')
+
+    def stats(self):
+        assets = self.manifest['assets'].values()
+        return {
+            'assets': len(self.manifest['assets']),
+            'memory_bytes': sum(len(data) for data in self.files.values()),
+            'source_bytes': sum(e['source_bytes'] for e in assets),
+            'fallback_bytes': sum(e['variants']['fallback']['bytes'] for e in assets),
+            'webp_bytes': sum(e['variants']['webp']['bytes'] for e in assets),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=['build', 'list'])
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--force', action='store_true', help='bangun ulang semua aset')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        manifest, built = build(cache_dir=args.cache_dir, force=args.force)
+        print(f"{built} aset dibangun, {len(manifest['assets']) - built} sudah terbaru -> {args.cache_dir}",
+              file=sys.stderr)
+    manifest = load_manifest(args.cache_dir)
+    if not manifest['assets']:
+        sys.exit('manifest kosong, jalankan: python assets.py build')
+    print(f"{'sumber':<40} {'asli':>8} {'fallback':>22} {'webp':>18}")
+    for path, entry in sorted(manifest['assets'].items()):
+        fallback, webp = entry['variants']['fallback'], entry['variants']['webp']
+        print(f"{path:<40} {entry['source_bytes']:>8} {fallback['format']:>4} "
+              f"{fallback['width']:>4}x{fallback['height']:<4} {fallback['bytes']:>7} "
+              f"{webp['width']:>4}x{webp['height']:<4} {webp['bytes']:>7}")
+    total = AssetStore(manifest, args.cache_dir).stats()
+    print(f"total: asli {total['source_bytes']} B, fallback {total['fallback_bytes']} B, "
+          f"webp {total['webp_bytes']} B")
+
+
+if __name__ == '__main__':
+    main()
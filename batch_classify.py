@@ -0,0 +1,175 @@
+"""Klasifikasi skin tone secara batch tanpa Streamlit
+
+Contoh:
+    python batch_classify.py foto/ -o hasil.jsonl
+    python batch_classify.py --manifest daftar.txt -o hasil.csv --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, init_worker
+from exposure import check_exposure
+from ingest import INGEST_MAX_SIDE, decode_image
+from profiles import load_config
+from skin_tone import analyze
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png'}
+FIELDS = ['path', 'label', 'h', 's', 'v', 'mask_pixels', 'face', 'exposure', 'error']
+
+
+
+def iter_directory(root):
+    """Telusuri direktori secara bertahap (tanpa memuat seluruh daftar file)"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTS:
+                yield os.path.join(dirpath, name)
+
+
+def iter_manifest(manifest):
+    """Satu path per baris, baris kosong dan '#' diabaikan"""
+    with open(manifest, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def classify_file(path, config=None):
+    """Proses satu file, kembalikan satu record hasil
+
+    Foto yang ditolak check_exposure dicatat dengan error exposure_<status>
+    tanpa menjalankan deteksi wajah.
+    """
+    record = dict.fromkeys(FIELDS)
+    record['path'] = path
+    try:
+        with open(path, 'rb') as f:
+            img_np = decode_image(f.read(), max_side=INGEST_MAX_SIDE)
+        exposure = check_exposure(img_np)
+        record['exposure'] = exposure.status
+        if exposure.rejected:
+            record['error'] = f"exposure_{exposure.status}"
+            return record
+        result = analyze(img_np, config=config, correction=exposure.correction,
+                         min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+        if result is None:
+            record['error'] = 'no_face'
+            return record
+        record.update(label=result.label, h=result.h, s=result.s, v=result.v,
+                      mask_pixels=result.mask_pixels,
+                      face=list(result.face) if result.face is not None else None)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def _truncate_partial_line(path):
+    """Buang baris terakhir yang terpotong (misalnya karena crash saat menulis)"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+def load_checkpoint(path, fmt):
+    """Kumpulkan path yang sudah selesai dari file output sebelumnya"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    _truncate_partial_line(path)
+    with open(path, encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            done.update(row['path'] for row in csv.DictReader(f))
+        else:
+            done.update(json.loads(line)['path'] for line in f if line.strip())
+    return done
+
+
+class ResultWriter:
+    def __init__(self, path, fmt, append):
+        new_file = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.fmt = fmt
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if new_file:
+                self.writer.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            row = dict(record)
+            row['face'] = ' '.join(map(str, row['face'])) if row['face'] else ''
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        # flush tiap record supaya output juga berfungsi sebagai checkpoint
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run(paths, output, fmt, workers, max_in_flight, done=(), config=None):
+    """Proses path secara streaming dengan jumlah tugas aktif yang dibatasi"""
+    writer = ResultWriter(output, fmt, append=bool(done))
+    counts = {'processed': 0, 'skipped': 0, 'errors': 0}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            pending = set()
+            for path in paths:
+                if path in done:
+                    counts['skipped'] += 1
+                    continue
+                pending.add(pool.submit(classify_file, path, config))
+                if len(pending) >= max_in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _drain(finished, writer, counts)
+            finished, _ = wait(pending)
+            _drain(finished, writer, counts)
+    finally:
+        writer.close()
+    return counts
+
+
+def _drain(futures, writer, counts):
+    for future in futures:
+        record = future.result()
+        writer.write(record)
+        counts['processed'] += 1
+        if record['error']:
+            counts['errors'] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', help='direktori foto (dibaca rekursif)')
+    parser.add_argument('--manifest', help='file berisi satu path foto per baris')
+    parser.add_argument('-o', '--output', required=True, help='file hasil .jsonl atau .csv')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='default: dari ekstensi output')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--resume', action='store_true', help='lewati path yang sudah ada di output')
+    parser.add_argument('--profile', help='nama profil di profiles.json (default: profil aktif)')
+    args = parser.parse_args(argv)
+
+    if bool(args.directory) == bool(args.manifest):
+        parser.error('isi salah satu: directory atau --manifest')
+    fmt = args.format or ('csv' if Path(args.output).suffix.lower() == '.csv' else 'jsonl')
+
+    paths = iter_manifest(args.manifest) if args.manifest else iter_directory(args.directory)
+    done = load_checkpoint(args.output, fmt) if args.resume else set()
+    counts = run(paths, args.output, fmt, args.workers, max_in_flight=args.workers * 4, done=done,
+                 config=load_config(args.profile))
+    print(f"selesai: {counts['processed']} diproses, {counts['skipped']} dilewati, "
+          f"{counts['errors']} gagal", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
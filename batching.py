@@ -0,0 +1,172 @@
+"""Micro-batching untuk request klasifikasi yang datang bersamaan
+
+Request yang masuk dalam jendela singkat (max_wait_ms) atau sampai batch
+penuh (max_batch) digabung, lalu diproses sekali; tiap pemanggil menerima
+hasilnya sendiri. Untuk skin tone, ROI wajah yang sudah diperkecil diproses
+lewat skin_tone.analyze_rois sehingga konversi HSV, mask dan histogram hanya
+berjalan sekali per batch.
+
+Menyetel jendela tanpa server (simulasi beban dengan ROI sintetis):
+    python batching.py --clients 32 --max-batch 1 8 32 --max-wait-ms 0 2 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import deque
+
+import synthetic
+from skin_tone import analyze_rois, face_roi, resize_roi
+
+
+STATS_WINDOW = 1024  # jumlah sampel terakhir untuk persentil di stats()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class MicroBatcher:
+    """Kumpulkan item dari banyak coroutine dan proses bersama di executor
+
+    process menerima list item dan harus mengembalikan list hasil dengan
+    urutan yang sama. Dijalankan di executor (default: thread pool loop)
+    supaya event loop tetap melayani request lain.
+    """
+
+    def __init__(self, process, max_batch=16, max_wait_ms=5.0, executor=None):
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self._queue = None
+        self._runner = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.batches = 0
+        self.items = 0
+        self.waits_ms = deque(maxlen=STATS_WINDOW)  # latensi tambahan: dari submit sampai batch mulai diproses
+        self.process_ms = deque(maxlen=STATS_WINDOW)
+        self.started = time.perf_counter()
+
+    async def submit(self, item):
+        if self._runner is None or self._runner.done():
+            self._queue = asyncio.Queue()
+            self._runner = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # ambil yang sudah mengantre tanpa menunggu lagi
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            start = time.perf_counter()
+            self.waits_ms.extend((start - queued) * 1000 for queued, _, _ in batch)
+            try:
+                results = await loop.run_in_executor(self.executor, self.process,
+                                                     [item for _, item, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.process_ms.append((time.perf_counter() - start) * 1000)
+            self.batches += 1
+            self.items += len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': self.items / self.batches if self.batches else 0.0,
+            'throughput': self.items / elapsed if elapsed > 0 else 0.0,
+            'wait_p50_ms': statistics.median(self.waits_ms) if self.waits_ms else 0.0,
+            'wait_p95_ms': _percentile(self.waits_ms, 0.95),
+            'process_p50_ms': statistics.median(self.process_ms) if self.process_ms else 0.0,
+        }
+
+
+def classify_roi_batch(items, config=None):
+    """Fungsi process untuk MicroBatcher: items berupa (roi, box)"""
+    rois = [roi for roi, _ in items]
+    boxes = [box for _, box in items]
+    return analyze_rois(rois, boxes, config)
+
+
+async def _simulate(rois, clients, per_client, max_batch, max_wait_ms):
+    batcher = MicroBatcher(classify_roi_batch, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    latencies = []
+
+    async def client(i):
+        for j in range(per_client):
+            roi = rois[(i + j) % len(rois)]
+            start = time.perf_counter()
+            await batcher.submit((roi, None))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    stats = batcher.stats()
+    await batcher.close()
+    stats['latency_p50_ms'] = statistics.median(latencies)
+    stats['latency_p95_ms'] = _percentile(latencies, 0.95)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='jumlah pemanggil bersamaan')
+    parser.add_argument('--requests', type=int, default=20, help='request per pemanggil')
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[0.0, 2.0, 5.0])
+    parser.add_argument('--roi-max-side', type=int, default=128)
+    args = parser.parse_args(argv)
+
+    rois = []
+    for i, tone in enumerate(synthetic.SKIN_TONES):
+        img, box = synthetic.face_image(1280, 720, tone, seed=i)
+        rois.append(resize_roi(face_roi(img, box), args.roi_max_side))
+
+    print(f"{'max_batch':>9} {'wait_ms':>7} {'req/s':>8} {'batch':>6} "
+          f"{'antre p50':>9} {'antre p95':>9} {'lat p50':>8} {'lat p95':>8}")
+    for max_batch in args.max_batch:
+        for max_wait_ms in args.max_wait_ms:
+            s = asyncio.run(_simulate(rois, args.clients, args.requests, max_batch, max_wait_ms))
+            print(f"{max_batch:>9} {max_wait_ms:>7.1f} {s['throughput']:>8.0f} {s['mean_batch']:>6.1f} "
+                  f"{s['wait_p50_ms']:>9.2f} {s['wait_p95_ms']:>9.2f} "
+                  f"{s['latency_p50_ms']:>8.2f} {s['latency_p95_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
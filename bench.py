@@ -0,0 +1,179 @@
+"""Benchmark tahap-tahap pipeline deteksi dan klasifikasi
+
+Contoh:
+    python bench.py --save baseline.json
+    python bench.py --compare baseline.json --tolerance 0.15
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import synthetic
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_face, get_registry
+from exposure import check_exposure
+from ingest import INGEST_MAX_SIDE, decode_image
+from metrics import process_rss
+from skin_tone import analyze
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png'}
+STAGES = ['decode', 'exposure', 'gray', 'cascade', 'refine', 'roi', 'hsv', 'mask', 'median', 'classify', 'total']
+
+
+def synthetic_cases(resolutions):
+    """Wajah sintetis di-encode JPEG, supaya tahap decode ikut terukur"""
+    selected = {name: synthetic.RESOLUTIONS[name] for name in resolutions}
+    for name, img, box, tone in synthetic.corpus(selected):
+        buf = BytesIO()
+        Image.fromarray(img).save(buf, format='JPEG', quality=92)
+        yield name, buf.getvalue(), box
+
+
+def file_cases(root):
+    for path in sorted(p for p in Path(root).rglob('*') if p.suffix.lower() in IMAGE_EXTS):
+        yield f"images/{path.relative_to(root).as_posix()}", path.read_bytes(), None
+
+
+def run_pipeline(data, fallback_box, detect_kwargs):
+    """Satu kali jalan pipeline lengkap seperti mainsec.py, kembalikan durasi tiap tahap (ms)"""
+    start = time.perf_counter()
+    img = decode_image(data, max_side=INGEST_MAX_SIDE)
+    decode_ms = (time.perf_counter() - start) * 1000
+    exposure = check_exposure(img)
+    timings = {'decode_ms': decode_ms, 'exposure_ms': exposure.elapsed_ms}
+
+    result = None
+    # foto yang ditolak pre-check berhenti di sini, sama seperti di aplikasi
+    if not exposure.rejected:
+        result = analyze(img, correction=exposure.correction, **detect_kwargs)
+    if result is None and fallback_box is not None and not exposure.rejected:
+        # cascade gagal: tetap ukur tahap analisis dengan kotak acuan
+        detect_timings = {}
+        detect_face(img, timings=detect_timings, **detect_kwargs)
+        result = analyze(img, fallback_box, correction=exposure.correction)
+        result.timings.update(detect_timings)
+    if result is not None:
+        timings.update(result.timings)
+    timings['total_ms'] = (time.perf_counter() - start) * 1000
+    return {key[:-3]: value for key, value in timings.items()}, result
+
+
+def percentiles(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(float(p50), 4), 'p95': round(float(p95), 4), 'p99': round(float(p99), 4),
+            'n': len(values)}
+
+
+def bench_case(data, box, repeat, warmup, detect_kwargs):
+    for _ in range(warmup):
+        run_pipeline(data, box, detect_kwargs)
+    samples = {}
+    result = None
+    for _ in range(repeat):
+        timings, result = run_pipeline(data, box, detect_kwargs)
+        for stage, value in timings.items():
+            samples.setdefault(stage, []).append(value)
+
+    tracemalloc.start()
+    run_pipeline(data, box, detect_kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'stages': {stage: percentiles(samples[stage]) for stage in STAGES if stage in samples},
+        'peak_traced_bytes': peak,
+        'label': result.label if result is not None else None,
+        'face_found': result is not None,
+    }
+
+
+def compare(current, baseline, tolerance, min_ms):
+    """Daftar regresi p50 (naik lebih dari tolerance dan lebih dari min_ms)"""
+    regressions = []
+    for case, data in current['cases'].items():
+        base = baseline['cases'].get(case)
+        if base is None:
+            continue
+        for stage, stats in data['stages'].items():
+            old = base['stages'].get(stage)
+            if old is None:
+                continue
+            new_p50, old_p50 = stats['p50'], old['p50']
+            if new_p50 > old_p50 * (1 + tolerance) and new_p50 - old_p50 > min_ms:
+                regressions.append((case, stage, old_p50, new_p50))
+        if data['label'] != base.get('label'):
+            regressions.append((case, 'label', base.get('label'), data['label']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', nargs='+', default=list(synthetic.RESOLUTIONS),
+                        choices=list(synthetic.RESOLUTIONS))
+    parser.add_argument('--images', default='images', help="direktori foto tambahan ('' untuk tidak dipakai)")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--full-res', action='store_true', help='deteksi tanpa downscale')
+    parser.add_argument('--save', help='simpan hasil sebagai baseline JSON')
+    parser.add_argument('--compare', help='bandingkan dengan baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='kenaikan p50 yang masih diterima')
+    parser.add_argument('--min-ms', type=float, default=0.5, help='abaikan selisih p50 di bawah ini')
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(1)
+    get_registry().warm()
+    detect_kwargs = {'min_size': DETECT_MIN_SIZE,
+                     'max_side': None if args.full_res else DETECT_MAX_SIDE}
+
+    cases = list(synthetic_cases(args.resolutions))
+    if args.images:
+        cases += list(file_cases(args.images))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'detect': detect_kwargs,
+        },
+        'cases': {},
+    }
+    print(f"{'case':<40} {'stage':<9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, data, box in cases:
+        result = bench_case(data, box, args.repeat, args.warmup, detect_kwargs)
+        report['cases'][name] = result
+        for stage, stats in result['stages'].items():
+            print(f"{name:<40} {stage:<9} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f}")
+        print(f"{name:<40} peak {result['peak_traced_bytes'] / 1e6:.1f} MB, label={result['label']}")
+
+    # 0 jika tidak tersedia (Windows)
+    report['meta']['max_rss_bytes'] = process_rss()['peak_rss_bytes']
+    print(f"max RSS proses: {report['meta']['max_rss_bytes'] / 1e6:.1f} MB")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_ms)
+        for case, stage, old, new in regressions:
+            print(f"REGRESI {case} {stage}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print('tidak ada regresi')
+
+
+if __name__ == '__main__':
+    main()
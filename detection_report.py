@@ -0,0 +1,102 @@
+"""Laporan akurasi vs latensi: deteksi resolusi penuh vs deteksi piramida
+
+Contoh:
+    python detection_report.py images --max-side 1024 640 480 --repeat 3
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from detector import detect_face, detect_faces
+
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png'}
+
+
+def iter_images(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob('*') if p.suffix.lower() in IMAGE_EXTS)
+        else:
+            yield path
+
+
+def load_rgb(path):
+    return np.asarray(ImageOps.exif_transpose(Image.open(path)).convert('RGB'))
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=['images'])
+    parser.add_argument('--max-side', type=int, nargs='+', default=[1280, 960, 640, 480])
+    parser.add_argument('--min-size', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-refine', action='store_true')
+    args = parser.parse_args(argv)
+
+    min_size = (args.min_size, args.min_size)
+    configs = [None] + args.max_side
+    rows = {cfg: {'times': [], 'found': 0, 'match': 0, 'ious': []} for cfg in configs}
+    n_images = 0
+
+    for path in iter_images(args.paths):
+        img = load_rgb(path)
+        n_images += 1
+        # Semua wajah pada resolusi penuh dipakai sebagai acuan
+        reference = detect_faces(img, min_size=min_size)
+
+        for cfg in configs:
+            box, times = timed(lambda: detect_face(img, min_size=min_size, max_side=cfg,
+                                                   refine=not args.no_refine), args.repeat)
+            row = rows[cfg]
+            row['times'].extend(times)
+            if box is None:
+                continue
+            row['found'] += 1
+            best = max((iou(box, ref) for ref in reference), default=0.0)
+            row['ious'].append(best)
+            if best >= 0.5:
+                row['match'] += 1
+
+    if not n_images:
+        parser.error('tidak ada gambar ditemukan')
+
+    base_p50 = statistics.median(rows[None]['times'])
+    print(f"{n_images} gambar, repeat={args.repeat}, refine={not args.no_refine}")
+    print(f"{'max_side':>9} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8} {'found':>6} {'match':>6} {'mean IoU':>9}")
+    for cfg in configs:
+        row = rows[cfg]
+        times = sorted(row['times'])
+        p50 = statistics.median(times)
+        p95 = times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+        mean_iou = statistics.mean(row['ious']) if row['ious'] else float('nan')
+        label = 'full' if cfg is None else str(cfg)
+        print(f"{label:>9} {p50:>9.1f} {p95:>9.1f} {base_p50 / p50:>7.1f}x "
+              f"{row['found']:>6} {row['match']:>6} {mean_iou:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import contextlib
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_CASCADE = 'haarcascade_frontalface_default.xml'
+# parameter deteksi aplikasi (mainsec.py), dipakai juga oleh server dan tool batch
+DETECT_MIN_SIZE = (25, 25)
+# sisi terpanjang gambar saat deteksi wajah, kotak dipetakan lagi ke resolusi asli
+DETECT_MAX_SIDE = 960
+
+
+class CascadeRegistry:
+    """Registry model Haar Cascade: tiap model dimuat sekali, lalu dipakai ulang
+
+    CascadeClassifier tidak dijamin aman dipakai bersamaan, jadi instance
+    dipinjam dari pool per model lewat acquire() dan dikembalikan setelah
+    dipakai. Pool tidak terikat ke thread: Streamlit membuat thread
+    ScriptRunner baru tiap rerun, dan XML baru diparse lagi hanya jika ada
+    deteksi yang berjalan bersamaan melebihi isi pool.
+    """
+
+    def __init__(self, cascade_dir=None):
+        self.cascade_dir = cascade_dir or cv2.data.haarcascades
+        self._lock = threading.Lock()
+        self._idle = {}  # nama model -> classifier yang sedang tidak dipinjam
+        self._stats = {}
+
+    def _stat(self, name):
+        if name not in self._stats:
+            self._stats[name] = {'loads': 0, 'hits': 0, 'load_time_ms': 0.0}
+        return self._stats[name]
+
+    def _load(self, name):
+        start = time.perf_counter()
+        cascade = cv2.CascadeClassifier(self.cascade_dir + name)
+        if cascade.empty():
+            raise FileNotFoundError(f"Model cascade tidak ditemukan: {self.cascade_dir + name}")
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            stat = self._stat(name)
+            stat['loads'] += 1
+            stat['load_time_ms'] += elapsed
+        return cascade
+
+    @contextlib.contextmanager
+    def acquire(self, name=DEFAULT_CASCADE):
+        """Pinjam classifier selama blok with, muat dari XML hanya jika pool kosong"""
+        with self._lock:
+            idle = self._idle.setdefault(name, [])
+            cascade = idle.pop() if idle else None
+            if cascade is not None:
+                self._stat(name)['hits'] += 1
+        if cascade is None:
+            cascade = self._load(name)
+        try:
+            yield cascade
+        finally:
+            with self._lock:
+                self._idle[name].append(cascade)
+
+    def warm(self, name=DEFAULT_CASCADE):
+        """Pastikan minimal satu classifier model ini sudah dimuat"""
+        with self.acquire(name):
+            pass
+
+    def stats(self):
+        """Salinan statistik load dan hit per model, plus ukuran pool"""
+        with self._lock:
+            return {name: dict(stat, pooled=len(self._idle.get(name, ())))
+                    for name, stat in self._stats.items()}
+
+
+def init_worker():
+    """Initializer worker ProcessPoolExecutor: paralelisme sudah di level proses"""
+    cv2.setNumThreads(1)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registry global per proses"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = CascadeRegistry()
+    return _registry
+
+
+def _gray(image):
+    img_np = np.asarray(image)
+    if img_np.ndim == 2:
+        return img_np
+    return cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+
+
+def adaptive_scale_factor(size, min_size, base=1.05, max_levels=56):
+    """Pilih scaleFactor supaya jumlah level piramida cascade tidak lebih dari max_levels
+
+    Di bawah ~56 level (scaleFactor > ~1.06 pada 960 px) wajah kontras rendah
+    mulai terlewat dibanding deteksi resolusi penuh (lihat parity.py).
+    """
+    span = min(size) / max(min(min_size), 1)
+    if span <= 1:
+        return base
+    return max(base, span ** (1.0 / max_levels))
+
+
+def detect_faces(image, min_size=(25, 25), cascade_name=DEFAULT_CASCADE, registry=None,
+                 max_side=None, refine=True, timings=None, limit=None):
+    """Deteksi semua wajah, kembalikan array (N, 4) berisi kotak (x, y, w, h)
+
+    Jika max_side diisi, deteksi dijalankan pada salinan yang diperkecil dan
+    kotak dikembalikan dalam koordinat asli (lihat detect_face_pyramid).
+    Durasi tiap tahap (ms) ditulis ke dict timings bila diberikan.
+    """
+    timings = {} if timings is None else timings
+    with (registry or get_registry()).acquire(cascade_name) as face_cascade:
+        if max_side is not None:
+            return _pyramid_faces(image, face_cascade, max_side, min_size, refine, timings, limit)
+
+        start = time.perf_counter()
+        gray = _gray(image)
+        timings['gray_ms'] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        faces = face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.05,
+            minNeighbors=5,
+            minSize=min_size
+        )
+        timings['cascade_ms'] = (time.perf_counter() - start) * 1000
+    return np.asarray(faces, dtype=np.int32).reshape(-1, 4)[:limit]
+
+
+def detect_face(image, min_size=(25, 25), cascade_name=DEFAULT_CASCADE, registry=None,
+                max_side=None, refine=True, timings=None):
+    """Deteksi wajah menggunakan Haar Cascade, kembalikan wajah pertama atau None"""
+    faces = detect_faces(image, min_size=min_size, cascade_name=cascade_name, registry=registry,
+                         max_side=max_side, refine=refine, timings=timings, limit=1)
+    if len(faces) > 0:
+        return faces[0]
+    else:
+        return None
+
+
+def detect_face_pyramid(image, max_side=640, min_size=(25, 25), cascade_name=DEFAULT_CASCADE,
+                        registry=None, refine=True, refine_pad=0.25, timings=None):
+    """Deteksi pada gambar yang diperkecil, lalu (opsional) perhalus pada crop resolusi penuh"""
+    with (registry or get_registry()).acquire(cascade_name) as face_cascade:
+        faces = _pyramid_faces(image, face_cascade, max_side, min_size, refine,
+                               {} if timings is None else timings, 1, refine_pad)
+    return faces[0] if len(faces) else None
+
+
+def _pyramid_faces(image, face_cascade, max_side, min_size, refine, timings, limit, refine_pad=0.25):
+    img_np = np.asarray(image)
+    height, width = img_np.shape[:2]
+
+    start = time.perf_counter()
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        small = cv2.resize(img_np, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    else:
+        small = img_np
+    small_gray = _gray(small)
+    timings['gray_ms'] = (time.perf_counter() - start) * 1000
+
+    # minSize ikut diperkecil, tapi tidak lebih kecil dari jendela cascade (24x24)
+    small_min = (max(24, round(min_size[0] * scale)), max(24, round(min_size[1] * scale)))
+    start = time.perf_counter()
+    faces = face_cascade.detectMultiScale(
+        small_gray,
+        scaleFactor=adaptive_scale_factor(small_gray.shape[::-1], small_min),
+        minNeighbors=5,
+        minSize=small_min
+    )
+    timings['cascade_ms'] = (time.perf_counter() - start) * 1000
+    faces = np.asarray(faces, dtype=np.float64).reshape(-1, 4)[:limit]
+
+    # Kembalikan ke koordinat resolusi penuh
+    boxes = (faces / scale).round().astype(np.int32)
+    if not refine or scale >= 1.0 or len(boxes) == 0:
+        return boxes
+
+    # Perhalus pada crop di sekitar tiap kotak kasar
+    start = time.perf_counter()
+    for i, (x, y, w, h) in enumerate(boxes.tolist()):
+        pad_x, pad_y = int(w * refine_pad), int(h * refine_pad)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+        crop_gray = _gray(img_np[y0:y1, x0:x1])
+        refined = face_cascade.detectMultiScale(
+            crop_gray,
+            scaleFactor=1.05,
+            minNeighbors=5,
+            minSize=(max(min_size[0], int(w * 0.7)), max(min_size[1], int(h * 0.7))),
+            maxSize=(int(w * 1.4), int(h * 1.4))
+        )
+        if len(refined) > 0:
+            rx, ry, rw, rh = refined[0]
+            boxes[i] = (x0 + rx, y0 + ry, rw, rh)
+    timings['refine_ms'] = (time.perf_counter() - start) * 1000
+    return boxes
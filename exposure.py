@@ -0,0 +1,214 @@
+"""Pre-check pencahayaan sebelum deteksi wajah
+
+Histogram luminance dihitung pada thumbnail (stride, tanpa resize) sehingga
+foto yang tidak mungkin dianalisis (hampir tidak ada piksel terang, hampir
+semua piksel terbakar, atau gambar rata) bisa ditolak dalam hitungan
+milidetik, sebelum Haar Cascade berjalan. Latar gelap atau putih saja tidak
+cukup untuk menolak foto: wajahnya sendiri bisa tereksposur dengan benar.
+
+Satu-satunya koreksi adalah white balance gray-world jika seluruh foto jelas
+berwarna (cahaya lampu mempengaruhi seluruh scene, jadi gain dihitung dari
+thumbnail), diterapkan hanya ke ROI kulit saat analisis dan dinormalisasi ke
+kanal paling terang sehingga V tidak berubah. Kecerahan dan kontras tidak
+dikoreksi: V adalah fitur utama klasifikasi, dan wajah gelap tidak bisa
+dibedakan dari wajah yang kurang eksposur hanya dari histogram (gain dan
+CLAHE sama-sama mengubah label wajah yang eksposurnya benar, lihat
+--simulate).
+
+Simulasi efeknya pada korpus sintetis yang digelapkan/diterangkan dan pada
+wajah dengan eksposur benar di latar gelap/putih (bg-<abu-abu>):
+    python exposure.py --simulate
+    python exposure.py foto/*.jpg
+"""
+import argparse
+import math
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ExposurePolicy:
+    """Batas keputusan pre-check, dalam luminance 0-255 pada thumbnail"""
+    thumb_side: int = 128
+    # tolak (scene): hampir tidak ada piksel terang / 99% piksel terbakar / gambar rata
+    reject_dark_p99: int = 30
+    reject_bright_p01: int = 250
+    reject_flat_range: int = 10
+    # white balance (scene)
+    cast_ratio: float = 2.0  # rasio rata-rata kanal terbesar/terkecil
+    max_gain: float = 3.0
+    clipped_level: int = 250
+
+
+DEFAULT_POLICY = ExposurePolicy()
+
+MESSAGES = {
+    'dark': "Foto terlalu gelap. Coba di tempat yang lebih terang!",
+    'bright': "Foto terlalu terang (overexposed). Hindari cahaya langsung ke kamera!",
+    'flat': "Foto tidak memiliki detail (kosong atau tertutup). Coba ambil ulang!",
+}
+
+
+@dataclass(frozen=True)
+class Correction:
+    """Koreksi yang diterapkan ke piksel ROI (RGB uint8) sebelum analisis"""
+    gains: tuple  # gain per kanal R, G, B (gray-world), kanal paling terang = 1
+
+    def apply(self, roi):
+        roi = np.ascontiguousarray(roi, dtype=np.uint8)
+        if roi.size == 0:
+            return roi
+        table = np.clip(np.arange(256, dtype=np.float32)[:, None] * np.float32(self.gains), 0, 255)
+        return cv2.LUT(roi, table.astype(np.uint8)[:, None, :])
+
+
+@dataclass
+class ExposureReport:
+    status: str  # 'ok', 'dark', 'bright', 'flat', 'color_cast'
+    action: str  # 'ok', 'correct' (white balance), 'reject'
+    mean: float
+    p01: float
+    p05: float
+    p95: float
+    p99: float
+    bright_share: float
+    channel_means: tuple
+    correction: Correction = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def rejected(self):
+        return self.action == 'reject'
+
+    @property
+    def message(self):
+        return MESSAGES.get(self.status, '')
+
+
+def thumbnail(image, max_side=128):
+    """View ber-stride dari gambar, sisi terpanjang sekitar max_side (tanpa salinan)"""
+    img_np = np.asarray(image)
+    step = max(1, math.ceil(max(img_np.shape[:2]) / max_side))
+    return img_np[::step, ::step]
+
+
+def _percentile(cumsum, q):
+    return float(np.searchsorted(cumsum, q * cumsum[-1]))
+
+
+def check_exposure(image, policy=DEFAULT_POLICY):
+    """Nilai pencahayaan scene gambar RGB, kembalikan ExposureReport"""
+    start = time.perf_counter()
+    thumb = np.ascontiguousarray(thumbnail(image, policy.thumb_side))
+    luma = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+    hist = cv2.calcHist([luma], [0], None, [256], [0, 256]).ravel()
+    cumsum = np.cumsum(hist)
+    total = cumsum[-1]
+    mean = float(np.dot(hist, np.arange(256)) / total)
+    p01, p05, p95, p99 = (_percentile(cumsum, q) for q in (0.01, 0.05, 0.95, 0.99))
+    bright = float(hist[policy.clipped_level:].sum() / total)
+
+    # rata-rata kanal dari piksel yang tidak terbakar/terlalu gelap, untuk gray-world
+    usable = (luma > 15) & (luma < policy.clipped_level)
+    channel_means = tuple(float(m) for m in (thumb[usable].mean(axis=0) if usable.any() else thumb.reshape(-1, 3).mean(axis=0)))
+
+    status, action, correction = 'ok', 'ok', None
+    if p99 < policy.reject_dark_p99:
+        status, action = 'dark', 'reject'
+    elif p01 >= policy.reject_bright_p01:
+        status, action = 'bright', 'reject'
+    elif p99 - p01 < policy.reject_flat_range:
+        status, action = 'flat', 'reject'
+    elif min(channel_means) > 0 and max(channel_means) / min(channel_means) > policy.cast_ratio:
+        # dinormalisasi ke kanal paling terang supaya kecerahan tidak turun
+        brightest = max(channel_means)
+        gains = tuple(float(min(brightest / m, policy.max_gain)) for m in channel_means)
+        status, action, correction = 'color_cast', 'correct', Correction(gains)
+
+    return ExposureReport(status, action, mean, p01, p05, p95, p99, bright, channel_means, correction,
+                          (time.perf_counter() - start) * 1000)
+
+
+def perturb(image, kind):
+    """Versi gambar dengan pencahayaan buruk untuk simulasi"""
+    img = image.astype(np.float32)
+    if kind == 'dark':
+        img = img * 0.35
+    elif kind == 'very-dark':
+        img = img * 0.08
+    elif kind == 'bright':
+        img = 255 * (img / 255) ** 0.45 + 25
+    elif kind == 'washed':
+        img = img * 0.4 + 150
+    elif kind == 'tungsten':
+        img = img * np.array([1.0, 0.7, 0.35], dtype=np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def simulation_cases(resolutions, kind):
+    """Yield (gambar, kotak, tone): korpus sintetis diberi perturb(kind), atau latar abu-abu untuk 'bg-<nilai>'"""
+    import synthetic
+    selected = {r: synthetic.RESOLUTIONS[r] for r in resolutions}
+    if kind.startswith('bg-'):
+        for res_name, (width, height) in selected.items():
+            for i, tone in enumerate(synthetic.SKIN_TONES):
+                img, box = synthetic.face_image(width, height, tone, seed=i, background=int(kind[3:]))
+                yield img, box, tone
+        return
+    for _, img, box, tone in synthetic.corpus(selected):
+        yield perturb(img, kind), box, tone
+
+
+def simulate(resolutions, kinds, policy=DEFAULT_POLICY):
+    from detector import detect_face
+    from skin_tone import analyze
+
+    print(f"{'kondisi':<10} {'n':>3} {'ditolak':>7} {'dikoreksi':>9} {'benar tanpa':>11} {'benar dengan':>12} "
+          f"{'cek p50 ms':>10} {'deteksi ms':>10}")
+    for kind in kinds:
+        counts = {'n': 0, 'reject': 0, 'correct': 0, 'plain': 0, 'fixed': 0}
+        check_ms, detect_ms = [], []
+        for img, box, tone in simulation_cases(resolutions, kind):
+            counts['n'] += 1
+            report = check_exposure(img, policy)
+            check_ms.append(report.elapsed_ms)
+            start = time.perf_counter()
+            detect_face(img, max_side=960)
+            detect_ms.append((time.perf_counter() - start) * 1000)
+            # kotak acuan dipakai supaya yang diukur hanya efek koreksi pada label
+            plain = analyze(img, box)
+            counts['plain'] += plain.label == tone
+            if report.rejected:
+                counts['reject'] += 1
+                continue
+            counts['correct'] += report.action == 'correct'
+            counts['fixed'] += analyze(img, box, correction=report.correction).label == tone
+        n = counts['n']
+        print(f"{kind:<10} {n:>3} {counts['reject']:>7} {counts['correct']:>9} {counts['plain']:>6}/{n:<4} "
+              f"{counts['fixed']:>7}/{n:<4} {np.median(check_ms):>10.2f} {np.median(detect_ms):>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='foto yang dicek')
+    parser.add_argument('--simulate', action='store_true', help='uji korpus sintetis dengan pencahayaan buruk')
+    parser.add_argument('--resolutions', nargs='+', default=['vga', 'hd', 'fhd'])
+    parser.add_argument('--kinds', nargs='+', default=['normal', 'dark', 'very-dark', 'bright', 'washed', 'tungsten',
+                                                        'bg-30', 'bg-60', 'bg-252'])
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        simulate(args.resolutions, args.kinds)
+    from ingest import decode_image
+    for path in args.paths:
+        with open(path, 'rb') as f:
+            report = check_exposure(decode_image(f.read(), max_side=1600))
+        print(f"{path}: {report.status} ({report.action}) mean={report.mean:.0f} p05={report.p05:.0f} "
+              f"p95={report.p95:.0f} terang={report.bright_share:.0%} {report.elapsed_ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Decode foto sekali menjadi array RGB uint8 yang dipakai bersama oleh deteksi, analisis dan preview"""
+import math
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+BOX_COLOR = (0, 255, 0)
+# JPEG besar didekode langsung ke skala DCT terdekat di atas ukuran ini
+INGEST_MAX_SIDE = 1600
+
+
+def decode_image(data, max_side=None):
+    """Decode bytes foto langsung ke array RGB uint8 yang contiguous
+
+    Untuk JPEG dengan max_side, Image.draft meminta decoder memakai skala DCT
+    (1/2, 1/4, 1/8) sehingga sisi terpanjang hasilnya tidak lebih kecil dari
+    max_side tapi tidak perlu mendekode resolusi penuh. Orientasi EXIF ikut
+    diterapkan.
+    """
+    img = Image.open(BytesIO(data))
+    if max_side is not None and img.format == 'JPEG':
+        # draft hanya memperkecil jika kedua sisi tetap >= kotak yang diminta,
+        # jadi kotaknya mengikuti rasio foto, bukan persegi max_side x max_side
+        scale = max_side / max(img.size)
+        if scale < 1:
+            img.draft('RGB', (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    img = ImageOps.exif_transpose(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    # np.asarray pada gambar PIL sudah menghasilkan buffer baru yang contiguous
+    return np.asarray(img)
+
+
+def make_preview(image, face=None, max_side=960, color=BOX_COLOR, thickness=2):
+    """Preview untuk ditampilkan: diperkecil bila perlu, dengan kotak wajah"""
+    height, width = image.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1.0:
+        preview = cv2.resize(image, (round(width * scale), round(height * scale)),
+                             interpolation=cv2.INTER_AREA)
+    else:
+        preview = image.copy()
+    if face is not None:
+        x, y, w, h = (int(round(c * scale)) for c in face)
+        cv2.rectangle(preview, (x, y), (x + w, y + h), color, thickness)
+    return preview
+
+
+def encode_jpeg(image, quality=85):
+    """Encode array RGB ke bytes JPEG, bentuk ringkas preview yang disimpan di cache"""
+    ok, buf = cv2.imencode('.jpg', cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError('gagal encode JPEG')
+    return buf.tobytes()
+
+
+def annotate_faces(image, results, max_side=960, color=BOX_COLOR, thickness=2):
+    """Preview foto grup: semua kotak wajah beserta nomor dan labelnya dalam satu gambar"""
+    preview = make_preview(image, None, max_side=max_side)
+    scale = preview.shape[1] / image.shape[1]
+    for i, result in enumerate(results, start=1):
+        x, y, w, h = (int(round(c * scale)) for c in result.face)
+        cv2.rectangle(preview, (x, y), (x + w, y + h), color, thickness)
+        cv2.putText(preview, f"{i}. {result.label}", (x, max(12, y - 6)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+    return preview
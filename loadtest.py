@@ -0,0 +1,110 @@
+"""Uji beban untuk server.py di localhost
+
+Contoh:
+    python loadtest.py --url http://127.0.0.1:8080/classify -c 16 -n 400
+    python loadtest.py --image foto.jpg -c 32 --duration 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from PIL import Image
+
+import synthetic
+
+
+def sample_image(path=None):
+    if path:
+        with open(path, 'rb') as f:
+            return f.read()
+    img, _ = synthetic.face_image(1280, 720, 'MEDIUM')
+    buf = BytesIO()
+    Image.fromarray(img).save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+async def _request(reader, writer, head, body):
+    writer.write(head + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(url, body, deadline, remaining, latencies, statuses):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    head = (f"POST {path} HTTP/1.1\r\nHost: {parts.hostname}\r\n"
+            f"Content-Type: application/octet-stream\r\nContent-Length: {len(body)}\r\n\r\n").encode()
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        while time.perf_counter() < deadline and (remaining is None or remaining[0] > 0):
+            if remaining is not None:
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                status = await _request(reader, writer, head, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                statuses['conn_error'] += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] += 1
+            if status == 429:
+                # hormati backpressure server
+                await asyncio.sleep(0.05)
+    finally:
+        writer.close()
+
+
+async def run(url, body, concurrency, requests, duration):
+    latencies, statuses = [], Counter()
+    remaining = [requests] if requests else None
+    deadline = time.perf_counter() + (duration or float('inf'))
+    start = time.perf_counter()
+    await asyncio.gather(*(client(url, body, deadline, remaining, latencies, statuses)
+                           for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8080/classify')
+    parser.add_argument('--image', help='default: wajah sintetis 720p')
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    parser.add_argument('--duration', type=float, help='detik; jika diisi, -n diabaikan')
+    args = parser.parse_args(argv)
+
+    body = sample_image(args.image)
+    requests = None if args.duration else args.requests
+    elapsed, latencies, statuses = asyncio.run(
+        run(args.url, body, args.concurrency, requests, args.duration))
+
+    ok = statuses.get(200, 0)
+    print(f"{sum(statuses.values())} request dalam {elapsed:.2f} s, concurrency {args.concurrency}")
+    print(f"status: {dict(statuses)}")
+    print(f"throughput sukses: {ok / elapsed:.1f} req/s")
+    if latencies:
+        latencies.sort()
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+        print(f"latensi ms: p50 {statistics.median(latencies):.1f}, p95 {pick(0.95):.1f}, "
+              f"p99 {pick(0.99):.1f}, max {latencies[-1]:.1f}")
+
+
+if __name__ == '__main__':
+    main()
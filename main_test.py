@@ -4,6 +4,9 @@ from io import BytesIO
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw
+from detector import DETECT_MAX_SIDE, CascadeRegistry, detect_face as detect_face_core
+from profiles import load_config
+from skin_tone import UNKNOWN, analyze
 
 def convert_color(image, from_format='RGB', to_format='BGR'):
     if from_format == 'RGB' and to_format == 'BGR':
@@ -12,76 +15,29 @@ def convert_color(image, from_format='RGB', to_format='BGR'):
         return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     return image
 
+@st.cache_resource
+def load_profile():
+    """Profil 50% tengah gambar dari profiles.json"""
+    return load_config('center-v1')
+
+@st.cache_resource
+def load_detector_registry():
+    """Registry cascade yang dibagi ke semua sesi Streamlit"""
+    return CascadeRegistry()
+
 def detect_face(image):
     """Deteksi wajah menggunakan Haar Cascade"""
-    img_np = np.array(image)
-    gray = cv2.cvtColor(convert_color(img_np, 'RGB', 'BGR'), cv2.COLOR_BGR2GRAY)
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    faces = face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.05,
-        minNeighbors=5,
-        minSize=(100,100)
-    )
-    if len(faces) > 0:
-        return faces[0]
-    else:
-        return None
+    return detect_face_core(image, min_size=(100, 100), registry=load_detector_registry(),
+                            max_side=DETECT_MAX_SIDE)
 
-def skinTone_detector(image_data):
+def skinTone_detector(image):
     try:
-        # Mengambil ROI
-        width, height = img.size
-        left = width // 4
-        top = height // 4
-        right = left + width // 2
-        bottom = top + height // 2
-        cropped_img = img.crop((left, top, right, bottom))
-
-        # Konversi RGB ke HSV
-        cropped_arr = np.array(cropped_img)
-        hsv = cv2.cvtColor(cropped_arr, cv2.COLOR_RGB2HSV)
-        
-        hue = hsv[:, :, 0] * 2 # supaya jadi 0-360
-        saturation = hsv[:, :, 1]
-        value = hsv[:, :, 2]
-
-        # filter hanya warna kulit
-        valid_mask = (
-            (hue >= 0) & (hue <= 50) & 
-            (saturation >= 25) & (saturation <= 204) & 
-            (value >= 51) & (value <= 255)
-        )
-
-        filtered_hue = hue[valid_mask]
-        filtered_saturation = saturation[valid_mask]
-        filtered_value = value[valid_mask]
-
-        # Jika data terlalu sedikit, fallback ke semua pixel
-        if len(filtered_hue) < 50:
-            filtered_hue = hue.flatten()
-            filtered_saturation = saturation.flatten()
-            filtered_value = value.flatten()
-
-        avg_h = np.median(filtered_hue)
-        avg_s = np.median(filtered_saturation)
-        avg_v = np.median(filtered_value)
-
-        st.write(f"HSV rata-rata: H={avg_h:.2f}, S={avg_s:.2f}, V={avg_v:.2f}")
-
-        if 0 <= avg_h <= 50 and 10 <= avg_s <= 60 and 80 <avg_v <= 255:
-            return "FAIR"
-        elif 10 <= avg_h <= 50 and 30 <= avg_s <= 90 and 70 <avg_v <= 240:
-            return "LIGHT"
-        elif 10 <= avg_h <= 40 and 50 <= avg_s <= 120 and 40 <avg_v <= 200:
-            return "MEDIUM"
-        elif 0 <= avg_h <= 30 and 60 <= avg_s <= 150 and 20 <avg_v <= 100:
-            return "DARK"
-        else:
-            return "An Unknown Skin Tone"
+        result = analyze(image, config=load_profile())
+        st.write(f"HSV rata-rata: H={result.h:.2f}, S={result.s:.2f}, V={result.v:.2f}")
+        return result.label
     except Exception as e:
         st.error(f"Terjadi Kesalahan saat Mendeteksi: {e}")
-        return "An Unknown Skin Tone"
+        return UNKNOWN
 
 
 st.markdown(
@@ -129,6 +85,9 @@ with st.sidebar:
                             ['Description Site',
                             'Detector Site', 'Developers Profile'],
                             default_index=0)
+    if selected == 'Detector Site':
+        with st.expander('Detector Cache'):
+            st.json(load_detector_registry().stats())
 
 # halaman deskripsi
 if(selected=='Description Site'):
@@ -194,7 +153,7 @@ if (selected=='Detector Site'):
                 st.image(convert_color(img_with_box, 'BGR', 'RGB'), caption='Wajah Terdeteksi', use_container_width=True, clamp=True, output_format="JPEG")
                 
                 if st.button('Analisis Skin Tone'):
-                    st.session_state.result = skinTone_detector(uploaded_file)
+                    st.session_state.result = skinTone_detector(img)
                     go_to_result()
             else: 
                 st.error("Wajah tidak terdeteksi. Upload foto dengan wajah jelas!")
@@ -222,7 +181,7 @@ if (selected=='Detector Site'):
                     st.image(img_with_box_rgb, caption="Wajah Terdeteksi", use_container_width=True)
 
                     if st.button('Analisis Skin Tone'):
-                        st.session_state.result = skinTone_detector(picture)
+                        st.session_state.result = skinTone_detector(img)
                         go_to_result()
                 else:
                     st.error("Wajah tidak terdeteksi. Pastikan wajah terlihat jelas!")
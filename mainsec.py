@@ -1,94 +1,186 @@
+import importlib
+import os
+import threading
+import time
 import streamlit as st
 from streamlit_option_menu import option_menu
-from io import BytesIO
-import cv2
-import numpy as np
-from PIL import Image, ImageDraw
-
-def convert_color(image, from_format='RGB', to_format='BGR'):
-    if from_format == 'RGB' and to_format == 'BGR':
-        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-    elif from_format == 'BGR' and to_format == 'RGB':
-        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    return image
+from result_cache import CachedImage, ResultCache, content_key
+from metrics import Metrics, process_rss
+
+# detector, skin_tone, ingest dan profiles (cv2, numpy, PIL) baru diimport saat
+# halaman Detector memprosesnya; halaman Description dan Developers tidak butuh OpenCV
+
+_run_start = time.perf_counter()
+
+@st.cache_resource
+def load_detector_registry():
+    """Registry cascade yang dibagi ke semua sesi Streamlit"""
+    from detector import CascadeRegistry
+    return CascadeRegistry()
 
-def detect_face(image):
+def detect_face(image, timings=None):
     """Deteksi wajah menggunakan Haar Cascade"""
-    img_np = np.array(image)
-    gray = cv2.cvtColor(convert_color(img_np, 'RGB', 'BGR'), cv2.COLOR_BGR2GRAY)
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    faces = face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.05,
-        minNeighbors=5,
-        minSize=(25,25)
-    )
-    if len(faces) > 0:
-        return faces[0]
-    else:
+    from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_face as detect_face_core
+    return detect_face_core(image, min_size=DETECT_MIN_SIZE, registry=load_detector_registry(),
+                            max_side=DETECT_MAX_SIDE, timings=timings)
+
+@st.cache_resource
+def load_profile():
+    """Profil batas kelas aktif (profiles.json atau SKINTONE_PROFILE), dibaca sekali per proses"""
+    from profiles import load_config
+    return load_config()
+
+def _prewarm():
+    from skin_tone import compile_thresholds
+    from profiles import load_config
+    # diimpor hanya untuk efek sampingnya: memuat PIL, numpy dan cv2 sebelum upload pertama
+    importlib.import_module('ingest')
+    compile_thresholds(load_config().thresholds)
+    # pool cascade dibagi ke semua thread, jadi classifier yang dimuat di sini langsung dipakai
+    load_detector_registry().warm()
+
+@st.cache_resource
+def start_prewarm():
+    """Import modul OpenCV di thread latar (SKINTONE_PREWARM=1), sekali per proses"""
+    thread = threading.Thread(target=_prewarm, name='skintone-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def load_result_cache():
+    """Cache hasil per isi file, dibagi ke semua sesi Streamlit
+
+    Batas memori gambar untuk semua sesi diatur lewat SKINTONE_CACHE_MB.
+    """
+    return ResultCache(max_bytes=int(os.environ.get('SKINTONE_CACHE_MB', '256')) * 1024 * 1024)
+
+@st.cache_resource
+def load_assets():
+    """Palet dan foto tim yang sudah diperkecil (assets.py), dimuat ke memori sekali per proses"""
+    from assets import AssetStore
+    try:
+        return AssetStore.load()
+    except OSError:
+        # direktori cache tidak bisa ditulis: pakai file asli
         return None
 
-def skinTone_detector(image, face_coords=None):
+def show_asset(path, **kwargs):
+    """st.image dari aset di memori; format dikirim apa adanya supaya Streamlit tidak encode ulang"""
+    assets = load_assets()
+    image, output_format = assets.image(path) if assets is not None else (path, 'auto')
+    st.image(image, output_format=output_format, **kwargs)
+
+@st.cache_resource
+def load_metrics():
+    """Metrics proses, aktif jika SKINTONE_METRICS=1"""
+    return Metrics()
+
+def ingest_photo(data, cache_key):
+    """Decode sekali, cek pencahayaan, deteksi wajah, buat preview, lalu simpan ke cache"""
+    from exposure import check_exposure
+    from ingest import INGEST_MAX_SIDE, decode_image, encode_jpeg, make_preview
+    metrics = load_metrics()
+    timings = st.session_state.last_timings = {}
+    with metrics.timer('decode', timings):
+        img_np = decode_image(data, max_side=INGEST_MAX_SIDE)
+    with metrics.timer('exposure', timings):
+        exposure = check_exposure(img_np)
+    metrics.inc('exposure', status=exposure.status)
+    face = None
+    # foto yang ditolak pre-check tidak perlu melewati Haar Cascade
+    if not exposure.rejected:
+        detect_timings = {}
+        face = detect_face(img_np, timings=detect_timings)
+        metrics.observe_timings(detect_timings)
+        metrics.inc('faces', result='found' if face is not None else 'not_found')
+        timings.update(detect_timings)
+    with metrics.timer('preview', timings):
+        preview = encode_jpeg(make_preview(img_np, face))
+    return load_result_cache().put(cache_key, CachedImage(img_np, face, preview, exposure=exposure))
+
+def photo_error(cached, default):
+    """Pesan untuk foto tanpa wajah: alasan pre-check pencahayaan jika foto ditolak"""
+    exposure = cached.exposure
+    return exposure.message if exposure is not None and exposure.rejected else default
+
+def exposure_note(cached):
+    """Beri tahu pengguna jika warna cahaya ROI dikoreksi otomatis saat analisis"""
+    exposure = cached.exposure
+    if exposure is not None and exposure.correction is not None:
+        st.caption("Warna cahaya foto dikoreksi otomatis (white balance)")
+
+def correction_for(cached):
+    exposure = cached.exposure if cached is not None else None
+    return exposure.correction if exposure is not None else None
+
+def photo_image(cached, data, cache_key):
+    """Array RGB foto; decode ulang dari bytes upload jika gambar penuh sudah dilepas dari cache"""
+    image = cached.image
+    if image is None:
+        from ingest import INGEST_MAX_SIDE, decode_image
+        with load_metrics().timer('redecode', st.session_state.setdefault('last_timings', {})):
+            image = decode_image(data, max_side=INGEST_MAX_SIDE)
+        load_result_cache().update(cache_key, image=image)
+    return image
+
+def remember_photo(cache_key):
+    """Catat foto sesi ini; gambar penuh foto sebelumnya tidak dipakai lagi jadi dilepas"""
+    previous = st.session_state.get('photo_key')
+    if previous is not None and previous != cache_key:
+        load_result_cache().release_image(previous)
+    st.session_state.photo_key = cache_key
+
+def session_stats():
+    """Memori yang dipegang sesi ini: entri cache foto aktif dan jumlah key session_state"""
+    cache_key = st.session_state.get('photo_key')
+    return {'photo_bytes': load_result_cache().entry_nbytes(cache_key) if cache_key else 0,
+            'state_keys': len(st.session_state)}
+
+def analyze_group(cached, cache_key, data):
+    """Deteksi dan klasifikasi semua wajah di foto grup dalam satu pass"""
+    from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_faces
+    from ingest import annotate_faces, encode_jpeg
+    from skin_tone import analyze_faces
+    image = photo_image(cached, data, cache_key)
+    if cached.exposure is not None and cached.exposure.rejected:
+        faces = []
+    else:
+        faces = detect_faces(image, min_size=DETECT_MIN_SIZE, registry=load_detector_registry(),
+                             max_side=DETECT_MAX_SIDE)
+    results = analyze_faces(image, faces, load_profile(), correction_for(cached))
+    group = (results, encode_jpeg(annotate_faces(image, results)))
+    cache = load_result_cache()
+    cache.update(cache_key, group=group)
+    cache.release_image(cache_key)
+    return group
+
+def skinTone_detector(image, face_coords=None, cache_key=None, data=None):
+    from skin_tone import UNKNOWN, analyze
     try:
         # deteksi wajah
         if face_coords is None:
             st.error("Wajah tidak terdeteksi. Pastikan foto menunjukkan wajah dengan jelas!")
             return None
 
-        # Crop wajah dari gambar asli
-        x, y, w, h = face_coords
-        img_np = np.array(image)
-        face_roi = img_np[y+h//5:y+h*4//5, x+w//5:x+w*4//5]
-
-        # Pastikan tipe data benar
-        face_used = np.asarray(face_roi, dtype=np.uint8)
-
-        # Konversi ke RGB
-        hsv = cv2.cvtColor(face_used, cv2.COLOR_RGB2HSV)
-        hue, saturation, value = hsv[..., 0]*2, hsv[..., 1], hsv[...,2]
-
-        # Optimasi deteksi wajah
-        skin_pixels = (0 <= hue) & (hue <= 50) & (10 <= saturation) & (saturation <= 200) & (40 <= value)
-        h_skin = hue[skin_pixels] if skin_pixels.any() else hue.flatten()
-        s_skin = saturation[skin_pixels] if skin_pixels.any() else saturation.flatten()
-        v_skin = value[skin_pixels] if skin_pixels.any() else value.flatten()
-
-        # filter hanya warna kulit
-        valid_mask = (
-            (hue >= 0) & (hue <= 50) & 
-            (saturation >= 10) & (saturation <= 150) & 
-            (value >= 20) & (value <= 255)
-        )
-
-        filtered_hue = hue[valid_mask]
-        filtered_saturation = saturation[valid_mask]
-        filtered_value = value[valid_mask]
-
-        # Jika data terlalu sedikit, fallback ke semua pixel
-        if len(filtered_hue) < 50:
-            filtered_hue = hue.flatten()
-            filtered_saturation = saturation.flatten()
-            filtered_value = value.flatten()
-
-        avg_h = np.median(filtered_hue)
-        avg_s = np.median(filtered_saturation)
-        avg_v = np.median(filtered_value) 
-
-        st.write(f"HSV rata-rata: H={avg_h:.2f}, S={avg_s:.2f}, V={avg_v:.2f}")
-
-        if 0 <= avg_h <= 15 and 10 <= avg_s <= 80 and 190 <avg_v <= 255:
-            return "FAIR"
-        elif 10 <= avg_h <= 20 and 30 <= avg_s <= 100 and 160 <avg_v <= 220:
-            return "LIGHT"
-        elif 15 <= avg_h <= 25 and 60 <= avg_s <= 140 and 110 <avg_v <= 180:
-            return "MEDIUM"
-        elif 0 <= avg_h <= 20 and 90 <= avg_s <= 200 and 40 <avg_v <= 110:
-            return "DARK"
-        else:
-            return "An Unknown Skin Tone"
+        cached = load_result_cache().get(cache_key) if cache_key else None
+        result = cached.result if cached is not None else None
+        if result is None:
+            if image is None:
+                image = photo_image(cached, data, cache_key)
+            result = analyze(image, face_coords, config=load_profile(), correction=correction_for(cached))
+            load_metrics().observe_timings(result.timings)
+            st.session_state.setdefault('last_timings', {}).update(result.timings)
+            if cache_key:
+                load_result_cache().update(cache_key, result=result)
+        if cache_key:
+            # hasil sudah ada: yang tersisa di cache cukup preview, kotak wajah dan hasil
+            load_result_cache().release_image(cache_key)
+        load_metrics().inc('labels', label=result.label)
+        st.write(f"HSV rata-rata: H={result.h:.2f}, S={result.s:.2f}, V={result.v:.2f}")
+        return result.label
     except Exception as e:
         st.error(f"Terjadi Kesalahan saat Mendeteksi: {e}")
-        return "An Unknown Skin Tone"
+        return UNKNOWN
 
 
 st.markdown(
@@ -136,6 +228,19 @@ with st.sidebar:
                             ['Description Site',
                             'Detector Site', 'Developers Profile'],
                             default_index=0)
+    if selected == 'Detector Site':
+        with st.expander('Cache Stats'):
+            assets = load_assets()
+            st.json({'detector': load_detector_registry().stats(),
+                     'results': load_result_cache().stats(),
+                     'assets': assets.stats() if assets is not None else None,
+                     'session': session_stats(),
+                     'process': process_rss()})
+    # diisi di akhir script supaya memuat timing run ini
+    debug_panel = st.empty()
+
+if os.environ.get('SKINTONE_PREWARM') == '1':
+    start_prewarm()
 
 # halaman deskripsi
 if(selected=='Description Site'):
@@ -173,38 +278,33 @@ if (selected=='Detector Site'):
         st.title('Please Upload your Photo')
         st.button('<-- Back', on_click=go_back, key='back_button_upload')
         uploaded_file = st.file_uploader('Upload your photo', type=['jpg', 'png', 'jpeg'], help="Pastikan foto menunjukkan wajah dengan jelas!") 
+        group_mode = st.checkbox('Analisis semua wajah (foto grup)')
 
         if uploaded_file is not None:
-            img = Image.open(uploaded_file)
+            # rerun dengan file yang sama cukup ambil dari cache
+            data = uploaded_file.getvalue()
+            cache_key = content_key(data)
+            cached = load_result_cache().get(cache_key) or ingest_photo(data, cache_key)
+            remember_photo(cache_key)
 
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            buffered = BytesIO()
-            if uploaded_file.type in ['image/png', 'image/PNG']:
-                img.save(buffered, format="PNG")
-            else:
-                img.save(buffered, format="JPEG", quality=95)
-
-            buffered.seek(0)
-            img = Image.open(buffered)
-            img_np = np.array(img)
-
-            face = detect_face(img)
-            if face is not None:
-                x, y, w, h = face
-                img_with_box = img_np.copy()
-                cv2.rectangle(img_with_box, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                img_with_box = convert_color(img_with_box, 'RGB', 'BGR')
-                draw = ImageDraw.Draw(img)
-                draw.rectangle([x, y, x+w, y+h], outline="green", width=3)
-                st.image(convert_color(img_with_box, 'BGR', 'RGB'), caption='Wajah Terdeteksi', use_container_width=True, clamp=True, output_format="JPEG")
+            face = cached.face
+            if group_mode:
+                results, group_preview = cached.group or analyze_group(cached, cache_key, data)
+                if results:
+                    st.image(group_preview, caption=f'{len(results)} Wajah Terdeteksi', use_container_width=True)
+                    st.table([{'Wajah': i, 'Skin Tone': r.label, 'H': round(r.h, 2), 'S': round(r.s, 2), 'V': round(r.v, 2)}
+                              for i, r in enumerate(results, start=1)])
+                else:
+                    st.error(photo_error(cached, "Wajah tidak terdeteksi. Upload foto dengan wajah jelas!"))
+            elif face is not None:
+                st.image(cached.preview, caption='Wajah Terdeteksi', use_container_width=True, clamp=True, output_format="JPEG")
+                exposure_note(cached)
                 
                 if st.button('Analisis Skin Tone'):
-                    st.session_state.result = skinTone_detector(img, face)
+                    st.session_state.result = skinTone_detector(cached.image, face, cache_key, data)
                     go_to_result()
             else: 
-                st.error("Wajah tidak terdeteksi. Upload foto dengan wajah jelas!")
+                st.error(photo_error(cached, "Wajah tidak terdeteksi. Upload foto dengan wajah jelas!"))
                              
     elif st.session_state.subpage == "take_photo":
         st.title('Please Take a Photo')
@@ -213,26 +313,21 @@ if (selected=='Detector Site'):
         picture = st.camera_input("Take a picture")
         if picture:
             if picture:
-                img = Image.open(picture)
-                img_np = np.array(img)
-
-                img_bgr = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
+                data = picture.getvalue()
+                cache_key = content_key(data)
+                cached = load_result_cache().get(cache_key) or ingest_photo(data, cache_key)
+                remember_photo(cache_key)
 
-                face_coords = detect_face(img)
+                face_coords = cached.face
                 if face_coords is not None:
-                    x, y, w, h = face_coords
-                    img_with_box = img_bgr.copy()
-                    cv2.rectangle(img_with_box, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                    img_with_box_rgb = cv2.cvtColor(img_with_box, cv2.COLOR_BGR2RGB)
-                    draw = ImageDraw.Draw(img)
-                    draw.rectangle([x, y, x+w, y+h], outline="green", width=3)
-                    st.image(img_with_box_rgb, caption="Wajah Terdeteksi", use_container_width=True)
+                    st.image(cached.preview, caption="Wajah Terdeteksi", use_container_width=True)
+                    exposure_note(cached)
 
                     if st.button('Analisis Skin Tone'):
-                        st.session_state.result = skinTone_detector(img, face_coords)
+                        st.session_state.result = skinTone_detector(cached.image, face_coords, cache_key, data)
                         go_to_result()
                 else:
-                    st.error("Wajah tidak terdeteksi. Pastikan wajah terlihat jelas!")
+                    st.error(photo_error(cached, "Wajah tidak terdeteksi. Pastikan wajah terlihat jelas!"))
     
     # halaman hasil
     if st.session_state.subpage == "result":
@@ -249,18 +344,30 @@ if (selected=='Detector Site'):
             
             col1, col2, col3 = st.columns(3, gap='medium')
             with col1:
-                st.image(f"images/{skin}/Blush/Blush.png", caption="Blush", use_container_width=True)
+                show_asset(f"images/{skin}/Blush/Blush.png", caption="Blush", use_container_width=True)
             with col2:
-                st.image(f"images/{skin}/Foundation/Foundation.png", caption="Foundation", use_container_width=True)
+                show_asset(f"images/{skin}/Foundation/Foundation.png", caption="Foundation", use_container_width=True)
             with col3:
-                st.image(f"images/{skin}/Lipstick/Lipstick.png", caption="Lipstick", use_container_width=True)
+                show_asset(f"images/{skin}/Lipstick/Lipstick.png", caption="Lipstick", use_container_width=True)
 
 if (selected == 'Developers Profile'):
     st.markdown("<h1 style='text-align: center;'>Meet the team!</h1>", unsafe_allow_html=True)
-    st.image(f"images/Teams.jpg")
+    show_asset("images/Teams.jpg")
     st.text("1. Annisa Fawwaz Putriano - 2023105471")
     st.text("2. Michelle Hiu - 2023105488")
     st.text("3. Maizan Jamalina Yahnah - 2023105496")
     st.text("5. Najla Melinda Kiasati - 2023105534")
     st.text("6. Carissa Metta Wahyudi - 2023105506")
     st.text("7. Aulia Fasya - 2023105499")
+
+# panel debug metrics (hanya jika SKINTONE_METRICS=1)
+metrics = load_metrics()
+if metrics.enabled:
+    metrics.observe('script_run', (time.perf_counter() - _run_start) * 1000)
+    with debug_panel.container():
+        with st.expander('Debug Metrics'):
+            st.caption('Timing request terakhir (ms)')
+            st.json(st.session_state.get('last_timings', {}))
+            st.json(metrics.snapshot())
+            st.download_button('Prometheus metrics', metrics.prometheus(),
+                               file_name='metrics.txt', mime='text/plain')
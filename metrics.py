@@ -0,0 +1,144 @@
+"""Instrumentasi ringan: timer per tahap, counter, dan dump JSON / Prometheus
+
+Dimatikan secara default; aktifkan dengan SKINTONE_METRICS=1. Saat mati,
+timer() mengembalikan context manager kosong yang sama dan observe()/inc()
+langsung kembali, jadi biayanya hanya satu pengecekan atribut.
+RSS proses (process_rss) selalu ikut di snapshot() dan prometheus().
+"""
+import contextlib
+import os
+import sys
+import threading
+import time
+
+# batas bucket histogram dalam milidetik
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def process_rss():
+    """RSS proses saat ini dan puncaknya dalam byte (0 jika tidak tersedia, mis. di Windows)"""
+    try:
+        import resource  # hanya ada di Unix
+    except ImportError:
+        peak = 0
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss dalam KiB di Linux, byte di macOS
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        current = 0
+    return {'rss_bytes': current, 'peak_rss_bytes': max(peak, current)}
+
+
+class _Timer:
+    __slots__ = ('metrics', 'stage', 'sink', 'start')
+
+    def __init__(self, metrics, stage, sink):
+        self.metrics = metrics
+        self.stage = stage
+        self.sink = sink
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.metrics.observe(self.stage, elapsed)
+        if self.sink is not None:
+            self.sink[self.stage + '_ms'] = elapsed
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=None, prefix='skintone'):
+        if enabled is None:
+            enabled = os.environ.get('SKINTONE_METRICS', '') not in ('', '0', 'false')
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages = {}    # stage -> [count, sum_ms, bucket counts]
+        self._counters = {}  # (name, label items) -> value
+
+    def timer(self, stage, sink=None):
+        """Context manager pengukur durasi; hasil juga ditulis ke sink['<stage>_ms']"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, sink)
+
+    def observe(self, stage, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            stat = self._stages.get(stage)
+            if stat is None:
+                stat = self._stages[stage] = [0, 0.0, [0] * len(BUCKETS_MS)]
+            stat[0] += 1
+            stat[1] += ms
+            for i, bound in enumerate(BUCKETS_MS):
+                if ms <= bound:
+                    stat[2][i] += 1
+
+    def observe_timings(self, timings):
+        """Catat dict {'<stage>_ms': durasi} seperti SkinToneResult.timings"""
+        if not self.enabled:
+            return
+        for key, ms in timings.items():
+            self.observe(key[:-3] if key.endswith('_ms') else key, ms)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Ringkasan dalam bentuk dict (untuk JSON)"""
+        with self._lock:
+            stages = {
+                stage: {'count': count, 'sum_ms': total, 'mean_ms': total / count if count else 0.0}
+                for stage, (count, total, _) in self._stages.items()
+            }
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                label = ','.join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label}}}" if label else name] = value
+        return {'stages': stages, 'counters': counters, 'process': process_rss()}
+
+    def prometheus(self):
+        """Format teks exposition Prometheus"""
+        lines = []
+        metric = f"{self.prefix}_stage_duration_ms"
+        with self._lock:
+            if self._stages:
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, (count, total, buckets) in sorted(self._stages.items()):
+                for bound, n in zip(BUCKETS_MS, buckets):
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {n}')
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {total:.3f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {count}')
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                full = f"{self.prefix}_{name}_total"
+                if full not in typed:
+                    lines.append(f"# TYPE {full} counter")
+                    typed.add(full)
+                label = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{full}{{{label}}} {value}" if label else f"{full} {value}")
+        for name, value in process_rss().items():
+            full = f"{self.prefix}_process_{name}"
+            lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
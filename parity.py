@@ -0,0 +1,323 @@
+"""Uji paritas hasil varian detector terhadap kode awal (golden output)
+
+Varian acuan (*-ref) adalah salinan logika skinTone_detector dan
+detect_face dari kode awal mainsec.py dan main_test.py: Haar Cascade di
+resolusi penuh, mask numpy dan np.median. Setiap varian lain (pipeline
+yang dipakai aplikasi, server dan batch sekarang) dijalankan pada korpus
+sintetis yang sama lalu dibandingkan dengan acuan keluarganya: label harus
+sama dan median H, S, V boleh berbeda paling banyak --tolerance
+(--approx-tolerance untuk varian yang memang mendekati, misalnya ROI yang
+diperkecil). Waktu tiap varian ikut dicatat.
+
+Secara default hasil acuan dibaca dari parity_golden.json yang ikut di
+repo (tidak perlu menjalankan ulang deteksi resolusi penuh yang lambat) dan
+setiap varian juga dicek tidak berubah dari hasil yang tersimpan. --save
+menjalankan ulang acuan dan menulis golden baru; --no-golden hanya
+membandingkan dengan acuan yang dijalankan saat itu. Exit code 1 jika ada
+yang gagal.
+
+Contoh:
+    python parity.py
+    python parity.py --save parity_golden.json
+    python parity.py --no-golden --variant mainsec
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import synthetic
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_face, detect_faces
+from exposure import check_exposure
+from profiles import load_config
+from skin_tone import UNKNOWN, analyze, analyze_faces, analyze_rois, face_roi, resize_roi
+
+SCHEMA = 1
+GOLDEN = Path(__file__).resolve().parent / 'parity_golden.json'
+# min_size main_test.py; mainsec.py memakai DETECT_MIN_SIZE
+MAIN_TEST_MIN_SIZE = (100, 100)
+
+
+def reference_detect(image, min_size):
+    """detect_face kode awal: cascade dimuat tiap panggilan, resolusi penuh"""
+    gray = cv2.cvtColor(cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR), cv2.COLOR_BGR2GRAY)
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.05, minNeighbors=5, minSize=min_size)
+    return faces[0] if len(faces) > 0 else None
+
+
+def _reference_medians(hsv, valid_mask):
+    hue, saturation, value = hsv[..., 0] * 2, hsv[..., 1], hsv[..., 2]
+    valid_mask = valid_mask(hue, saturation, value)
+    filtered = [hue[valid_mask], saturation[valid_mask], value[valid_mask]]
+    # Jika data terlalu sedikit, fallback ke semua pixel
+    if len(filtered[0]) < 50:
+        filtered = [hue.flatten(), saturation.flatten(), value.flatten()]
+    return tuple(float(np.median(channel)) for channel in filtered)
+
+
+def reference_mainsec(image):
+    """skinTone_detector kode awal mainsec.py (tanpa Streamlit)"""
+    face_coords = reference_detect(image, DETECT_MIN_SIZE)
+    if face_coords is None:
+        return None
+    x, y, w, h = face_coords
+    img_np = np.array(image)
+    roi = np.asarray(img_np[y+h//5:y+h*4//5, x+w//5:x+w*4//5], dtype=np.uint8)
+    hsv = cv2.cvtColor(roi, cv2.COLOR_RGB2HSV)
+    avg_h, avg_s, avg_v = _reference_medians(hsv, lambda hue, s, v: (
+        (hue >= 0) & (hue <= 50) & (s >= 10) & (s <= 150) & (v >= 20) & (v <= 255)))
+    if 0 <= avg_h <= 15 and 10 <= avg_s <= 80 and 190 < avg_v <= 255:
+        label = "FAIR"
+    elif 10 <= avg_h <= 20 and 30 <= avg_s <= 100 and 160 < avg_v <= 220:
+        label = "LIGHT"
+    elif 15 <= avg_h <= 25 and 60 <= avg_s <= 140 and 110 < avg_v <= 180:
+        label = "MEDIUM"
+    elif 0 <= avg_h <= 20 and 90 <= avg_s <= 200 and 40 < avg_v <= 110:
+        label = "DARK"
+    else:
+        label = UNKNOWN
+    return label, avg_h, avg_s, avg_v, tuple(int(c) for c in face_coords)
+
+
+def reference_main_test(image):
+    """skinTone_detector kode awal main_test.py
+
+    Kode awal membaca variabel img yang tidak didefinisikan (NameError,
+    selalu jatuh ke except); di sini gambar yang sama dipakai sebagai img.
+    """
+    face_coords = reference_detect(image, MAIN_TEST_MIN_SIZE)
+    if face_coords is None:
+        return None
+    height, width = np.asarray(image).shape[:2]
+    left, top = width // 4, height // 4
+    cropped_arr = np.array(image)[top:top + height // 2, left:left + width // 2]
+    hsv = cv2.cvtColor(cropped_arr, cv2.COLOR_RGB2HSV)
+    avg_h, avg_s, avg_v = _reference_medians(hsv, lambda hue, s, v: (
+        (hue >= 0) & (hue <= 50) & (s >= 25) & (s <= 204) & (v >= 51) & (v <= 255)))
+    if 0 <= avg_h <= 50 and 10 <= avg_s <= 60 and 80 < avg_v <= 255:
+        label = "FAIR"
+    elif 10 <= avg_h <= 50 and 30 <= avg_s <= 90 and 70 < avg_v <= 240:
+        label = "LIGHT"
+    elif 10 <= avg_h <= 40 and 50 <= avg_s <= 120 and 40 < avg_v <= 200:
+        label = "MEDIUM"
+    elif 0 <= avg_h <= 30 and 60 <= avg_s <= 150 and 20 < avg_v <= 100:
+        label = "DARK"
+    else:
+        label = UNKNOWN
+    return label, avg_h, avg_s, avg_v, tuple(int(c) for c in face_coords)
+
+
+def _result(result, box=None):
+    if result is None:
+        return None
+    return result.label, result.h, result.s, result.v, tuple(int(c) for c in (result.face if box is None else box))
+
+
+def engine_single(profile, min_size):
+    config = load_config(profile)
+
+    def run(image):
+        face = detect_face(image, min_size=min_size, max_side=DETECT_MAX_SIDE)
+        if face is None:
+            return None
+        return _result(analyze(image, face, config=config), face)
+    return run
+
+
+def engine_exposure(profile, min_size):
+    """Seperti engine_single, dengan pre-check pencahayaan dan koreksinya (mainsec.py)"""
+    config = load_config(profile)
+
+    def run(image):
+        exposure = check_exposure(image)
+        if exposure.rejected:
+            return None
+        face = detect_face(image, min_size=min_size, max_side=DETECT_MAX_SIDE)
+        if face is None:
+            return None
+        return _result(analyze(image, face, config=config, correction=exposure.correction), face)
+    return run
+
+
+def engine_faces(profile):
+    """Jalur analyze_faces (mainsec mode semua wajah, server ?all=1), wajah pertama"""
+    config = load_config(profile)
+
+    def run(image):
+        faces = detect_faces(image, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+        results = analyze_faces(image, faces, config)
+        return _result(results[0]) if results else None
+    return run
+
+
+def engine_rois(profile, roi_max_side):
+    """Jalur micro-batch server.py: ROI diperkecil lalu analyze_rois"""
+    config = load_config(profile)
+
+    def run(image):
+        face = detect_face(image, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+        if face is None:
+            return None
+        box = tuple(int(c) for c in face)
+        return _result(analyze_rois([resize_roi(face_roi(image, box), roi_max_side)], [box], config)[0])
+    return run
+
+
+@dataclass
+class Variant:
+    name: str
+    reference: str  # nama varian acuan, None untuk acuan sendiri
+    run: object
+    approx: bool = False  # median boleh bergeser sampai --approx-tolerance, label tetap harus sama
+
+
+def variants():
+    return [
+        Variant('mainsec-ref', None, reference_mainsec),
+        Variant('mainsec', 'mainsec-ref', engine_single('face-v1', DETECT_MIN_SIZE)),
+        Variant('mainsec-faces', 'mainsec-ref', engine_faces('face-v1')),
+        Variant('mainsec-exposure', 'mainsec-ref', engine_exposure('face-v1', DETECT_MIN_SIZE)),
+        Variant('mainsec-stride', 'mainsec-ref', engine_single('face-v1-stride', DETECT_MIN_SIZE), approx=True),
+        Variant('server-batch', 'mainsec-ref', engine_rois('face-v1', 128), approx=True),
+        Variant('main_test-ref', None, reference_main_test),
+        Variant('main_test', 'main_test-ref', engine_single('center-v1', MAIN_TEST_MIN_SIZE)),
+    ]
+
+
+# latar abu-abu rata: wajah dengan eksposur benar di ruangan gelap dan di studio putih.
+# Wajah DARK di latar putih tidak dipakai: kontrasnya terbalik dan Haar Cascade resolusi
+# penuh maupun diperkecil sama-sama tidak stabil (ada/tidaknya wajah bergantung seed),
+# jadi label dan pre-check-nya diuji lewat exposure.py --simulate dengan kotak acuan.
+BACKGROUNDS = {'dim': (30, synthetic.SKIN_TONES), 'studio': (252, ('FAIR', 'LIGHT', 'MEDIUM'))}
+
+
+def corpus(resolutions):
+    """Korpus tetap: semua resolusi x skin tone, wajah besar (0.45) dan kecil (0.25), latar gelap dan putih"""
+    selected = {name: synthetic.RESOLUTIONS[name] for name in resolutions}
+    for name, img, box, tone in synthetic.corpus(selected):
+        yield name, img
+    for i, (res_name, (width, height)) in enumerate(selected.items()):
+        for j, tone in enumerate(synthetic.SKIN_TONES):
+            img, _ = synthetic.face_image(width, height, tone, face_frac=0.25, seed=100 + i * 10 + j)
+            yield f"{res_name}-{tone.lower()}-small", img
+            for bg_name, (level, tones) in BACKGROUNDS.items():
+                if tone not in tones:
+                    continue
+                img, _ = synthetic.face_image(width, height, tone, seed=200 + i * 10 + j, background=level)
+                yield f"{res_name}-{tone.lower()}-{bg_name}", img
+
+
+def compare(result, expected, tolerance):
+    """None jika cocok, atau alasan singkat jika tidak"""
+    if result is None or expected is None:
+        return None if result is None and expected is None else f"wajah: {expected is not None} -> {result is not None}"
+    if result[0] != expected[0]:
+        return f"label {expected[0]} -> {result[0]}"
+    delta = max(abs(a - b) for a, b in zip(result[1:4], expected[1:4]))
+    if delta > tolerance:
+        return f"median berbeda {delta:.1f}"
+    return None
+
+
+def _delta(result, expected):
+    if result is None or expected is None:
+        return (0.0, 0.0, 0.0)
+    return tuple(abs(a - b) for a, b in zip(result[1:4], expected[1:4]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', nargs='+', default=['vga', 'hd', 'fhd'],
+                        choices=list(synthetic.RESOLUTIONS))
+    parser.add_argument('--variant', nargs='+', help='hanya varian ini (acuannya ikut dijalankan)')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='selisih median H, S, V maksimum')
+    parser.add_argument('--approx-tolerance', type=float, default=6.0,
+                        help='selisih median untuk varian sampling/ROI diperkecil')
+    parser.add_argument('--save', help='jalankan ulang acuan dan simpan semua hasil sebagai golden JSON')
+    parser.add_argument('--golden', default=str(GOLDEN), help='baca hasil acuan dari golden JSON')
+    parser.add_argument('--no-golden', action='store_true', help='jalankan acuan, tanpa golden JSON')
+    args = parser.parse_args(argv)
+
+    golden = None
+    if not args.no_golden and not args.save:
+        with open(args.golden, encoding='utf-8') as f:
+            golden = json.load(f)
+        if golden.get('schema') != SCHEMA:
+            sys.exit(f"{args.golden}: schema tidak didukung")
+        if golden.get('opencv') != cv2.__version__:
+            print(f"catatan: golden dibuat dengan OpenCV {golden.get('opencv')}, sekarang {cv2.__version__}")
+    selected = variants()
+    if args.variant:
+        wanted = set(args.variant)
+        wanted |= {v.reference for v in selected if v.name in wanted and v.reference}
+        selected = [v for v in selected if v.name in wanted]
+    if golden is not None:
+        # acuan dibaca dari file, tidak dijalankan ulang
+        selected = [v for v in selected if v.reference is not None]
+
+    results, times = {}, {v.name: [] for v in selected}
+    for case, img in corpus(args.resolutions):
+        results[case] = {}
+        for v in selected:
+            start = time.perf_counter()
+            out = v.run(img)
+            times[v.name].append((time.perf_counter() - start) * 1000)
+            results[case][v.name] = None if out is None else [out[0], *map(float, out[1:4]), list(out[4])]
+
+    failures = []
+    summary = {}
+    for v in selected:
+        deltas, mismatches, changed = [], 0, 0
+        for case, outputs in results.items():
+            stored = golden['cases'].get(case, {}) if golden is not None else {}
+            if v.reference is not None:
+                expected = stored.get(v.reference) if golden is not None else outputs[v.reference]
+                if golden is not None and v.reference not in stored:
+                    failures.append(f"{case}: {v.reference} tidak ada di {args.golden}")
+                    continue
+                reason = compare(outputs[v.name], expected, args.approx_tolerance if v.approx else args.tolerance)
+                deltas.append(_delta(outputs[v.name], expected))
+                if reason:
+                    mismatches += 1
+                    failures.append(f"{case}: {v.name} vs {v.reference}: {reason}")
+            if v.name in stored and stored[v.name] != outputs[v.name]:
+                changed += 1
+                failures.append(f"{case}: {v.name} berubah dari golden: {stored[v.name]} -> {outputs[v.name]}")
+        summary[v.name] = (deltas, mismatches, changed)
+
+    reference_ms = {v.name: statistics.median(times[v.name]) for v in selected if v.reference is None}
+    if golden is not None:
+        reference_ms = golden.get('reference_ms', {})
+    print(f"{len(results)} gambar, toleransi median {args.tolerance} (mendekati: {args.approx_tolerance})")
+    print(f"{'varian':<16} {'acuan':<14} {'gagal':>5} {'berubah':>7} {'maks |dH|':>9} {'|dS|':>6} {'|dV|':>6} "
+          f"{'p50 ms':>8} {'total ms':>9} {'speedup':>8}")
+    for v in selected:
+        deltas, mismatches, changed = summary[v.name]
+        worst = np.max(deltas, axis=0) if deltas else (0.0, 0.0, 0.0)
+        p50 = statistics.median(times[v.name])
+        base = reference_ms.get(v.reference or v.name)
+        speedup = f"{base / p50:>7.1f}x" if base and p50 else f"{'-':>8}"
+        print(f"{v.name:<16} {v.reference or '-':<14} {mismatches:>5} {changed:>7} {worst[0]:>9.1f} "
+              f"{worst[1]:>6.1f} {worst[2]:>6.1f} {p50:>8.1f} {sum(times[v.name]):>9.0f} {speedup}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'schema': SCHEMA, 'opencv': cv2.__version__, 'resolutions': args.resolutions,
+                       'reference_ms': reference_ms, 'cases': results}, f, indent=1)
+        print(f"golden disimpan ke {args.save}")
+    if failures:
+        print(f"{len(failures)} perbedaan:")
+        for line in failures[:50]:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Profil batas kelas skin tone yang berversi (profiles.json)
+
+Tiap profil berisi cara mengambil ROI, rentang mask kulit dan batas kelas,
+lalu dikompilasi menjadi skin_tone.ThresholdLUT saat dipakai. Profil aktif
+dipilih dari field "active" di file, atau ditimpa dengan SKINTONE_PROFILE.
+
+Contoh:
+    python profiles.py list
+    python profiles.py use center-v1
+    python profiles.py diff face-v1 center-v1 --image images/Teams.jpg
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from detector import detect_face
+from ingest import decode_image
+from skin_tone import AnalysisConfig, analysis_pixels, analyze, compile_thresholds, pixel_votes
+
+PROFILE_PATH = Path(__file__).with_name('profiles.json')
+SCHEMA = 1
+
+
+def load_profiles(path=PROFILE_PATH):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('schema') != SCHEMA:
+        raise ValueError(f"{path}: schema {data.get('schema')} tidak didukung (harus {SCHEMA})")
+    return data
+
+
+def active_name(data):
+    return os.environ.get('SKINTONE_PROFILE') or data['active']
+
+
+def to_config(profile):
+    """Ubah satu profil JSON menjadi AnalysisConfig (tuple supaya bisa di-hash untuk cache LUT)"""
+    mask = profile['mask']
+    thresholds = tuple((c['label'], tuple(c['h']), tuple(c['s']), tuple(c['v']))
+                       for c in profile['classes'])
+    return AnalysisConfig(roi=profile.get('roi', 'face'), mask_h=tuple(mask['h']),
+                          mask_s=tuple(mask['s']), mask_v=tuple(mask['v']),
+                          min_pixels=profile.get('min_pixels', 50), thresholds=thresholds,
+                          sampling=profile.get('sampling', 'full'),
+                          pixel_budget=profile.get('pixel_budget', AnalysisConfig.pixel_budget),
+                          regions=profile.get('regions', 'box'))
+
+
+def load_config(name=None, path=PROFILE_PATH):
+    """AnalysisConfig untuk profil bernama name (default: profil aktif)"""
+    data = load_profiles(path)
+    name = name or active_name(data)
+    if name not in data['profiles']:
+        raise ValueError(f"profil tidak dikenal: {name} (ada: {', '.join(data['profiles'])})")
+    return to_config(data['profiles'][name])
+
+
+def set_active(name, path=PROFILE_PATH):
+    data = load_profiles(path)
+    if name not in data['profiles']:
+        raise ValueError(f"profil tidak dikenal: {name}")
+    # ganti field "active" saja supaya format file (dan diff di git) tetap rapi
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    text = re.sub(r'("active"\s*:\s*)"[^"]*"', lambda m: f'{m.group(1)}{json.dumps(name)}', text, count=1)
+    if json.loads(text).get('active') != name:
+        raise ValueError(f"{path}: field active tidak ditemukan")
+    tmp = Path(path).with_suffix('.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def diff_settings(a, b):
+    """Baris-baris perbedaan pengaturan dan batas kelas antara dua AnalysisConfig"""
+    lines = []
+    for field in ('roi', 'mask_h', 'mask_s', 'mask_v', 'min_pixels', 'sampling', 'pixel_budget', 'regions'):
+        if getattr(a, field) != getattr(b, field):
+            lines.append(f"  {field}: {getattr(a, field)} -> {getattr(b, field)}")
+    classes_a = {label: rest for label, *rest in a.thresholds}
+    classes_b = {label: rest for label, *rest in b.thresholds}
+    for label in dict.fromkeys([*classes_a, *classes_b]):
+        ra, rb = classes_a.get(label), classes_b.get(label)
+        if ra != rb:
+            fmt = lambda r: 'tidak ada' if r is None else ' '.join(f"{k}={tuple(v)}" for k, v in zip('hsv', r))
+            lines.append(f"  {label}: {fmt(ra)} -> {fmt(rb)}")
+    order_a = [label for label, *_ in a.thresholds]
+    order_b = [label for label, *_ in b.thresholds]
+    if order_a != order_b and set(order_a) == set(order_b):
+        lines.append(f"  urutan: {order_a} -> {order_b}")
+    return lines
+
+
+def diff_cells(a, b):
+    """Bandingkan tabel padat per piksel: Counter (label a, label b) untuk sel yang berbeda"""
+    lut_a, lut_b = compile_thresholds(a.thresholds), compile_thresholds(b.thresholds)
+    codes_a, codes_b = lut_a.pixel_table.ravel(), lut_b.pixel_table.ravel()
+    # hanya H mentah 0-179 yang dihasilkan cv2.cvtColor untuk gambar 8-bit
+    valid = 180 * 256 * 256
+    codes_a, codes_b = codes_a[:valid], codes_b[:valid]
+    width = len(lut_b.labels)
+    pairs = np.bincount(codes_a.astype(np.int64) * width + codes_b, minlength=len(lut_a.labels) * width)
+    changed = Counter()
+    for index in np.flatnonzero(pairs):
+        label_a, label_b = lut_a.labels[index // width], lut_b.labels[index % width]
+        if label_a != label_b:
+            changed[label_a, label_b] = int(pairs[index])
+    return changed, valid
+
+
+def _compare_images(paths, a, b, name_a, name_b):
+    for path in paths:
+        with open(path, 'rb') as f:
+            img = decode_image(f.read(), max_side=1600)
+        face = detect_face(img)
+        row = [str(path)]
+        for name, config in ((name_a, a), (name_b, b)):
+            if config.roi == 'face' and face is None:
+                row.append(f"{name}: wajah tidak terdeteksi")
+                continue
+            result = analyze(img, face, config=config)
+            roi = analysis_pixels(img, result.face, config)
+            votes = pixel_votes(roi, config)
+            top = ', '.join(f"{label} {share:.0%}" for label, share in
+                            sorted(votes.items(), key=lambda kv: -kv[1])[:2])
+            row.append(f"{name}: {result.label} (vote {top})")
+        print('  ' + ' | '.join(row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', default=PROFILE_PATH, type=Path)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='daftar profil')
+    show = sub.add_parser('show', help='tampilkan satu profil')
+    show.add_argument('name', nargs='?')
+    use = sub.add_parser('use', help='jadikan profil aktif')
+    use.add_argument('name')
+    diff = sub.add_parser('diff', help='bandingkan dua profil')
+    diff.add_argument('a')
+    diff.add_argument('b')
+    diff.add_argument('--image', nargs='+', default=[], help='bandingkan juga label pada foto ini')
+    args = parser.parse_args(argv)
+
+    data = load_profiles(args.file)
+    try:
+        if args.command == 'list':
+            active = active_name(data)
+            for name, profile in data['profiles'].items():
+                marker = '*' if name == active else ' '
+                print(f"{marker} {name:<16} {profile.get('description', '')}")
+        elif args.command == 'show':
+            name = args.name or active_name(data)
+            config = load_config(name, args.file)
+            print(f"{name}: roi={config.roi} mask h={config.mask_h} s={config.mask_s} "
+                  f"v={config.mask_v} min_pixels={config.min_pixels}")
+            if config.sampling != 'full' or config.regions != 'box':
+                print(f"  sampling={config.sampling} pixel_budget={config.pixel_budget} regions={config.regions}")
+            for label, h, s, v in config.thresholds:
+                print(f"  {label:<8} h={h} s={s} v={v}")
+        elif args.command == 'use':
+            set_active(args.name, args.file)
+            print(f"profil aktif: {args.name}")
+            if os.environ.get('SKINTONE_PROFILE'):
+                print(f"catatan: SKINTONE_PROFILE={os.environ['SKINTONE_PROFILE']} masih menimpa", file=sys.stderr)
+        elif args.command == 'diff':
+            a, b = load_config(args.a, args.file), load_config(args.b, args.file)
+            lines = diff_settings(a, b)
+            print(f"{args.a} -> {args.b}")
+            print('\n'.join(lines) if lines else '  pengaturan sama')
+            changed, total = diff_cells(a, b)
+            moved = sum(changed.values())
+            print(f"sel HSV berbeda label: {moved} dari {total} ({moved / total:.2%})")
+            for (label_a, label_b), count in changed.most_common():
+                print(f"  {label_a:>22} -> {label_b:<22} {count}")
+            if args.image:
+                print('foto:')
+                _compare_images(args.image, a, b, args.a, args.b)
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+def _nbytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return getattr(value, 'nbytes', 0)
+
+
+@dataclass
+class CachedImage:
+    """Hasil olahan satu file foto: array RGB, preview berkotak, kotak wajah, hasil klasifikasi
+
+    image adalah satu-satunya buffer besar; setelah analisis selesai (atau saat
+    memori cache penuh) ia dilepas menjadi None dan sisanya tetap berupa
+    artefak ringkas: preview JPEG, kotak wajah dan hasil.
+    """
+    image: object
+    face: tuple = None
+    preview: object = None  # bytes JPEG (atau array)
+    result: object = None
+    # mode foto grup: (list SkinToneResult, preview beranotasi bytes JPEG)
+    group: tuple = None
+    # hasil exposure.check_exposure, None jika pre-check tidak dijalankan
+    exposure: object = None
+
+    @property
+    def nbytes(self):
+        return _nbytes(self.image) + self.compact_nbytes
+
+    @property
+    def compact_nbytes(self):
+        group_preview = self.group[1] if self.group else None
+        return _nbytes(self.preview) + _nbytes(group_preview)
+
+
+def content_key(data):
+    """Kunci cache dari isi file (bukan nama file)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Cache LRU dengan TTL dan batas memori, aman dipakai dari banyak sesi
+
+    Jika melebihi max_bytes, gambar penuh dari entri paling lama dilepas
+    lebih dulu (artefak ringkasnya tetap ada); baru setelah itu entri dibuang.
+    """
+
+    def __init__(self, max_entries=32, ttl=600, max_bytes=256 * 1024 * 1024, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (waktu simpan, CachedImage)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.released = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self._clock() - item[0] > self.ttl:
+                self._remove(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.nbytes > self.max_bytes:
+                return entry
+            self._entries[key] = (self._clock(), entry)
+            self._bytes += entry.nbytes
+            self._evict()
+        return entry
+
+    def update(self, key, **fields):
+        """Tambah field (mis. result) ke entri yang sudah ada, tanpa mengubah TTL"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry = item[1]
+            self._bytes -= entry.nbytes
+            for name, value in fields.items():
+                setattr(entry, name, value)
+            self._bytes += entry.nbytes
+            self._evict()
+            return entry
+
+    def release_image(self, key):
+        """Lepas array gambar penuh sebuah entri, kembalikan entri (atau None jika tidak ada)"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._release(item[1])
+            return item[1]
+
+    def entry_nbytes(self, key):
+        """Byte yang dipakai satu entri (0 jika tidak ada), untuk laporan per sesi"""
+        with self._lock:
+            item = self._entries.get(key)
+            return item[1].nbytes if item is not None else 0
+
+    def _release(self, entry):
+        if entry.image is not None:
+            self._bytes -= entry.nbytes
+            entry.image = None
+            self._bytes += entry.nbytes
+            self.released += 1
+
+    def _remove(self, key):
+        _, entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+    def _evict(self):
+        now = self._clock()
+        for key in [k for k, (stored, _) in self._entries.items() if now - stored > self.ttl]:
+            self._remove(key)
+            self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        if self._bytes > self.max_bytes:
+            # entri terbaru (yang sedang dipakai) tidak ikut dilepas di tahap ini
+            for _, entry in list(self._entries.values())[:-1]:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._release(entry)
+        while self._entries and self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'image_bytes': sum(_nbytes(entry.image) for _, entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'released': self.released,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
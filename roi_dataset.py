@@ -0,0 +1,312 @@
+"""Dataset HSV ROI wajah yang di-memory-map untuk menilai ulang batas kelas
+
+Tahap extract menjalankan decode + deteksi sekali per foto dan menyimpan
+piksel HSV ROI setiap wajah. Tahap rescore membaca file itu tanpa salinan
+(np.memmap) dan menghitung median + label untuk profil mana pun, sehingga
+eksperimen batas kelas tidak perlu mengulang decode dan Haar Cascade.
+
+Isi direktori dataset:
+    pixels.u8     piksel HSV (OpenCV, uint8) semua ROI berurutan, bentuk (N, 3)
+                  dengan H, S, V berselang-seling per piksel (bukan per kanal),
+                  sehingga skin_mask bisa langsung memakai potongannya
+    index.npy     satu baris per wajah: image, rank, kotak, offset dan jumlah piksel
+    images.json   metadata dan daftar path foto (indeks = kolom image)
+
+Contoh:
+    python roi_dataset.py extract foto/ -o data/roi --workers 4
+    python roi_dataset.py rescore data/roi --profile face-v1 center-v1 --truth dirname
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from batch_classify import iter_directory, iter_manifest
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_faces, init_worker
+from exposure import check_exposure
+from ingest import INGEST_MAX_SIDE, decode_image
+from profiles import active_name, load_config, load_profiles
+from skin_tone import (HUE_DEGREES, LABELS, center_roi, compile_thresholds, face_roi, histogram_medians,
+                       resize_roi, skin_mask)
+
+SCHEMA = 1
+INDEX_DTYPE = np.dtype([
+    ('image', '<i4'), ('rank', '<i2'),
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'),
+    ('offset', '<i8'), ('count', '<i8'),
+])
+# piksel per potongan saat rescore (~12 MB HSV), membatasi memori sementara berapa pun ukuran dataset
+CHUNK_PIXELS = 1 << 22
+
+
+def extract_file(path, roi_mode='face', roi_max_side=0, max_faces=None):
+    """Dijalankan di worker: kembalikan (path, [(rank, box, piksel HSV (n, 3))], error)
+
+    Pre-check pencahayaan sama seperti server: foto yang ditolak dicatat
+    sebagai error exposure_<status>, koreksi white balance diterapkan ke ROI.
+    """
+    try:
+        with open(path, 'rb') as f:
+            img = decode_image(f.read(), max_side=INGEST_MAX_SIDE)
+        exposure = check_exposure(img)
+        if exposure.rejected:
+            return path, [], f"exposure_{exposure.status}"
+        if roi_mode == 'face':
+            faces = detect_faces(img, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE, limit=max_faces)
+            items = [(tuple(int(c) for c in box), face_roi(img, box)) for box in faces]
+        else:
+            items = [((0, 0, 0, 0), center_roi(img))]
+        rois = []
+        for rank, (box, roi) in enumerate(items):
+            if exposure.correction is not None:
+                roi = exposure.correction.apply(roi)
+            if roi_max_side:
+                roi = resize_roi(roi, roi_max_side)
+            hsv = cv2.cvtColor(np.ascontiguousarray(roi), cv2.COLOR_RGB2HSV)
+            rois.append((rank, box, hsv.reshape(-1, 3)))
+        return path, rois, None
+    except Exception as e:
+        return path, [], f"{type(e).__name__}: {e}"
+
+
+def extract(paths, output, workers, roi_mode='face', roi_max_side=0, max_faces=None):
+    """Tulis dataset ke direktori output secara streaming"""
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    images, errors, rows = [], {}, []
+    offset = 0
+    with open(output / 'pixels.u8', 'wb') as pixels, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pending = set()
+
+        def drain(futures):
+            nonlocal offset
+            for future in futures:
+                path, rois, error = future.result()
+                image_id = len(images)
+                images.append(path)
+                if error:
+                    errors[path] = error
+                for rank, (x, y, w, h), hsv in rois:
+                    pixels.write(hsv.tobytes())
+                    rows.append((image_id, rank, x, y, w, h, offset, len(hsv)))
+                    offset += len(hsv)
+
+        for path in paths:
+            pending.add(pool.submit(extract_file, path, roi_mode, roi_max_side, max_faces))
+            if len(pending) >= workers * 4:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                drain(finished)
+        drain(wait(pending)[0])
+
+    np.save(output / 'index.npy', np.array(rows, dtype=INDEX_DTYPE))
+    meta = {'schema': SCHEMA, 'roi': roi_mode, 'roi_max_side': roi_max_side,
+            'detect_min_size': DETECT_MIN_SIZE, 'detect_max_side': DETECT_MAX_SIDE,
+            'ingest_max_side': INGEST_MAX_SIDE, 'images': images, 'errors': errors}
+    with open(output / 'images.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return len(images), len(rows), len(errors)
+
+
+class RoiDataset:
+    """Akses baca tanpa salinan ke dataset hasil extract"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        with open(self.root / 'images.json', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('schema') != SCHEMA:
+            raise ValueError(f"{root}: schema {self.meta.get('schema')} tidak didukung")
+        self.index = np.load(self.root / 'index.npy', mmap_mode='r')
+        size = os.path.getsize(self.root / 'pixels.u8')
+        self.pixels = (np.memmap(self.root / 'pixels.u8', dtype=np.uint8, mode='r').reshape(-1, 3)
+                       if size else np.zeros((0, 3), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def images(self):
+        return self.meta['images']
+
+    def roi(self, i):
+        """Piksel HSV wajah ke-i (view ke memmap)"""
+        row = self.index[i]
+        return self.pixels[row['offset']:row['offset'] + row['count']]
+
+    def medians(self, config, faces=None, chunk_pixels=CHUNK_PIXELS):
+        """Median H (derajat), S, V dan jumlah piksel mask untuk tiap wajah, sama seperti hsv_stats
+
+        Selalu memakai semua piksel ROI; config.sampling diabaikan. Hanya
+        rentang piksel wajah yang dipilih yang dibaca, per potongan paling
+        banyak chunk_pixels piksel, jadi memori sementara tidak tumbuh
+        dengan ukuran dataset.
+        """
+        if self.meta['roi'] != config.roi:
+            raise ValueError(f"dataset diekstrak dengan roi={self.meta['roi']}, profil memakai roi={config.roi}")
+        if config.roi == 'face' and config.regions != 'box':
+            raise ValueError(f"dataset menyimpan roi kotak wajah, profil memakai regions={config.regions}")
+        rows = self.index if faces is None else self.index[faces]
+        count = len(rows)
+        avg_h, avg_s, avg_v = (np.zeros(count) for _ in range(3))
+        mask_pixels = np.zeros(count, dtype=np.int64)
+        for start, stop in _face_batches(rows['count'], chunk_pixels):
+            batch = _batch_medians(self.pixels, rows[start:stop], config, chunk_pixels)
+            for out, values in zip((avg_h, avg_s, avg_v, mask_pixels), batch):
+                out[start:stop] = values
+        return avg_h, avg_s, avg_v, mask_pixels
+
+
+def _face_batches(counts, chunk_pixels):
+    """Rentang [start, stop) wajah berurutan yang total pikselnya tidak lebih dari chunk_pixels
+
+    Wajah yang lebih besar dari chunk_pixels menjadi batch sendiri.
+    """
+    start, total = 0, 0
+    for i, n in enumerate(counts.tolist()):
+        if i > start and total + n > chunk_pixels:
+            yield start, i
+            start, total = i, 0
+        total += n
+    if start < len(counts):
+        yield start, len(counts)
+
+
+def _batch_medians(pixels, rows, config, chunk_pixels):
+    """Median satu batch wajah; histogram per wajah diakumulasi dari potongan piksel"""
+    count = len(rows)
+    # [kulit saja / semua piksel][kanal H, S, V] -> histogram (wajah, 256)
+    hists = np.zeros((2, 3, count, 256), dtype=np.int64)
+    pieces = []
+    for slot, (offset, n) in enumerate(zip(rows['offset'].tolist(), rows['count'].tolist())):
+        # wajah yang lebih besar dari satu potongan dibaca bertahap
+        for a in range(offset, offset + n, chunk_pixels):
+            pieces.append((slot, a, min(a + chunk_pixels, offset + n)))
+
+    group, size = [], 0
+    for piece in pieces + [None]:
+        if group and (piece is None or size + piece[2] - piece[1] > chunk_pixels):
+            _accumulate(hists, pixels, group, config)
+            group, size = [], 0
+        if piece is not None:
+            group.append(piece)
+            size += piece[2] - piece[1]
+
+    mask_pixels = hists[0, 1].sum(axis=1)
+    # wajah dengan piksel kulit terlalu sedikit memakai semua pikselnya
+    fallback = (mask_pixels < config.min_pixels)[:, None]
+    avg_h, avg_s, avg_v = (histogram_medians(np.where(fallback, hists[1, c], hists[0, c])) for c in range(3))
+    return avg_h, avg_s, avg_v, mask_pixels
+
+
+def _accumulate(hists, pixels, group, config):
+    if len(group) == 1:
+        hsv = pixels[group[0][1]:group[0][2]]  # view ke memmap
+    else:
+        hsv = np.concatenate([pixels[a:b] for _, a, b in group])
+    count = hists.shape[2]
+    owner = np.repeat(np.array([slot for slot, _, _ in group], dtype=np.int32),
+                      [b - a for _, a, b in group]) * 256
+    mask = skin_mask(hsv[None], config)[0] > 0
+    for c, channel in enumerate((HUE_DEGREES[hsv[:, 0]], hsv[:, 1], hsv[:, 2])):
+        keys = owner + channel
+        hists[1, c] += np.bincount(keys, minlength=count * 256).reshape(count, 256)
+        hists[0, c] += np.bincount(keys[mask], minlength=count * 256).reshape(count, 256)
+
+
+def truth_from_path(path, mode):
+    """Label sebenarnya dari path: 'dirname' = komponen direktori pertama yang berupa label"""
+    if mode == 'dirname':
+        for part in Path(path).parts[:-1]:
+            if part.upper() in LABELS:
+                return part.upper()
+    return None
+
+
+def rescore(dataset, names, truth=None, all_faces=False, output=None):
+    faces = None if all_faces else np.flatnonzero(dataset.index['rank'] == 0)
+    image_ids = dataset.index['image'] if faces is None else dataset.index['image'][faces]
+    labels_by_profile = {}
+    for name in names:
+        config = load_config(name)
+        start = time.perf_counter()
+        avg_h, avg_s, avg_v, _ = dataset.medians(config, faces)
+        labels = compile_thresholds(config.thresholds).classify_many(avg_h, avg_s, avg_v)
+        elapsed = (time.perf_counter() - start) * 1000
+        labels_by_profile[name] = labels
+        counts = Counter(labels.tolist())
+        print(f"{name}: {len(labels)} wajah dalam {elapsed:.1f} ms  {dict(counts.most_common())}")
+        if truth:
+            expected = [truth_from_path(dataset.images[i], truth) for i in image_ids]
+            scored = [(e, l) for e, l in zip(expected, labels) if e is not None]
+            if scored:
+                correct = sum(e == l for e, l in scored)
+                print(f"  akurasi: {correct}/{len(scored)} ({correct / len(scored):.1%})")
+
+    if len(names) > 1:
+        base = labels_by_profile[names[0]]
+        for name in names[1:]:
+            changed = Counter((a, b) for a, b in zip(base, labels_by_profile[name]) if a != b)
+            print(f"{names[0]} -> {name}: {sum(changed.values())} label berubah")
+            for (a, b), n in changed.most_common(10):
+                print(f"  {a:>22} -> {b:<22} {n}")
+
+    if output:
+        rows = dataset.index if faces is None else dataset.index[faces]
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['path', 'rank', 'face', *names])
+            for i, row in enumerate(rows):
+                face = f"{row['x']} {row['y']} {row['w']} {row['h']}"
+                writer.writerow([dataset.images[row['image']], row['rank'], face,
+                                 *(labels_by_profile[name][i] for name in names)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    ext = sub.add_parser('extract', help='decode + deteksi sekali, simpan piksel HSV ROI')
+    ext.add_argument('directory', nargs='?', help='direktori foto (dibaca rekursif)')
+    ext.add_argument('--manifest', help='file berisi satu path foto per baris')
+    ext.add_argument('-o', '--output', required=True, help='direktori dataset')
+    ext.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ext.add_argument('--roi', choices=['face', 'center'], default='face')
+    ext.add_argument('--roi-max-side', type=int, default=0, help='perkecil ROI (0 = resolusi penuh, hasil identik)')
+    ext.add_argument('--max-faces', type=int, help='batas wajah per foto (default: semua)')
+    score = sub.add_parser('rescore', help='hitung ulang label dari dataset')
+    score.add_argument('dataset')
+    score.add_argument('--profile', nargs='+', help='default: profil aktif')
+    score.add_argument('--truth', choices=['dirname'], help='ambil label sebenarnya dari path')
+    score.add_argument('--all-faces', action='store_true', help='default: hanya wajah pertama tiap foto')
+    score.add_argument('-o', '--output', help='tulis label per wajah ke CSV')
+    args = parser.parse_args(argv)
+
+    if args.command == 'extract':
+        if bool(args.directory) == bool(args.manifest):
+            parser.error('isi salah satu: directory atau --manifest')
+        paths = iter_manifest(args.manifest) if args.manifest else iter_directory(args.directory)
+        start = time.perf_counter()
+        images, faces, errors = extract(paths, args.output, args.workers, args.roi,
+                                        args.roi_max_side, args.max_faces)
+        print(f"selesai: {images} foto, {faces} wajah, {errors} gagal dalam "
+              f"{time.perf_counter() - start:.1f} s", file=sys.stderr)
+    else:
+        names = args.profile or [None]
+        try:
+            dataset = RoiDataset(args.dataset)
+            rescore(dataset, [name or active_name(load_profiles()) for name in names], args.truth,
+                    args.all_faces, args.output)
+        except ValueError as e:
+            sys.exit(str(e))
+
+
+if __name__ == '__main__':
+    main()
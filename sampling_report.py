@@ -0,0 +1,107 @@
+"""Galat dan biaya strategi sampling ROI terhadap median semua piksel
+
+Untuk tiap wajah (sintetis di semua resolusi synthetic.RESOLUTIONS, plus
+foto opsional) median H, S, V dihitung sekali dengan semua piksel ROI
+sebagai acuan, lalu dengan tiap strategi: stride dan random dengan beberapa
+budget piksel, serta regions='cheeks' (dahi + kedua pipi). Dilaporkan galat
+median, jumlah label yang berubah, dan waktu analysis_pixels + hsv_stats
+per resolusi supaya terlihat biayanya tetap datar.
+
+Contoh:
+    python sampling_report.py
+    python sampling_report.py images/Teams.jpg foto/ --budget 2048 8192 --profile center-v1
+"""
+import argparse
+import dataclasses
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+import synthetic
+from batch_classify import iter_directory
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_faces
+from ingest import INGEST_MAX_SIDE, decode_image
+from profiles import load_config
+from skin_tone import analysis_pixels, classify_hsv, hsv_stats
+
+
+def strategies(config, budgets):
+    """(nama, AnalysisConfig) untuk setiap strategi, dimulai dari acuan semua piksel"""
+    full = dataclasses.replace(config, sampling='full', regions='box')
+    items = [('full', full)]
+    items += [(f"stride {b}", dataclasses.replace(full, sampling='stride', pixel_budget=b)) for b in budgets]
+    items += [(f"random {b}", dataclasses.replace(full, sampling='random', pixel_budget=b)) for b in budgets]
+    if config.roi == 'face':
+        items.append(('cheeks', dataclasses.replace(full, regions='cheeks')))
+        items += [(f"cheeks stride {b}", dataclasses.replace(full, regions='cheeks', sampling='stride',
+                                                             pixel_budget=b)) for b in budgets]
+    return items
+
+
+def cases(paths):
+    """Yield (grup, gambar, kotak wajah)"""
+    for name, img, box, _ in synthetic.corpus():
+        yield name.split('-')[0], img, box
+    for root in paths:
+        files = [root] if Path(root).is_file() else iter_directory(root)
+        for path in files:
+            with open(path, 'rb') as f:
+                img = decode_image(f.read(), max_side=INGEST_MAX_SIDE)
+            for box in detect_faces(img, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE):
+                yield 'foto', img, tuple(int(c) for c in box)
+
+
+def measure(img, box, config, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pixels = analysis_pixels(img, box, config)
+        stats = hsv_stats(pixels, config)
+        times.append((time.perf_counter() - start) * 1000)
+    return stats[:3], pixels.shape[0] * pixels.shape[1], statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='foto atau direktori foto tambahan')
+    parser.add_argument('--profile', help='profil dasar (default: profil aktif)')
+    parser.add_argument('--budget', type=int, nargs='+', default=[1024, 4096, 16384])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    config = load_config(args.profile)
+    items = strategies(config, args.budget)
+    rows = {name: {'err': [], 'pixels': [], 'ms': {}, 'changed': 0} for name, _ in items}
+    total = 0
+    for group, img, box in cases(args.paths):
+        total += 1
+        reference = None
+        for name, cfg in items:
+            hsv, pixels, ms = measure(img, box, cfg, args.repeat)
+            if reference is None:
+                reference = hsv
+            row = rows[name]
+            row['err'].append(np.abs(np.subtract(hsv, reference)))
+            row['pixels'].append(pixels)
+            row['ms'].setdefault(group, []).append(ms)
+            row['changed'] += classify_hsv(*hsv, cfg.thresholds) != classify_hsv(*reference, cfg.thresholds)
+
+    groups = list(rows['full']['ms'])
+    print(f"{total} wajah, acuan: semua piksel ROI ({config.roi})")
+    print(f"{'strategi':<20} {'piksel p50':>10} {'|dH| rata/maks':>15} {'|dS| rata/maks':>15} "
+          f"{'|dV| rata/maks':>15} {'label berubah':>13}")
+    for name, row in rows.items():
+        err = np.array(row['err'])
+        cols = ' '.join(f"{err[:, c].mean():>7.2f}/{err[:, c].max():<7.1f}" for c in range(3))
+        print(f"{name:<20} {int(statistics.median(row['pixels'])):>10} {cols} {row['changed']:>6}/{total}")
+
+    print()
+    print(f"{'ms p50':<20} " + ' '.join(f"{g:>8}" for g in groups))
+    for name, row in rows.items():
+        print(f"{name:<20} " + ' '.join(f"{statistics.median(row['ms'][g]):>8.2f}" for g in groups))
+
+
+if __name__ == '__main__':
+    main()
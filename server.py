@@ -0,0 +1,365 @@
+"""Layanan HTTP lokal untuk klasifikasi skin tone
+
+Server asyncio (tanpa dependensi tambahan) yang menerima bytes gambar dan
+mengembalikan JSON. Pekerjaan OpenCV dijalankan di process pool dengan
+antrean terbatas: jika penuh, request ditolak dengan 429. Foto yang gagal
+pre-check pencahayaan (exposure.py) langsung dijawab 422 tanpa deteksi.
+
+Dengan --batch-size > 1, worker hanya decode dan mendeteksi wajah; ROI wajah
+yang diperkecil lalu dikumpulkan oleh batching.MicroBatcher dan dianalisis
+bersama (lihat batching.py untuk menyetel --batch-wait-ms). Antrean default
+ikut diperbesar supaya batch bisa terisi. Skema JSON /classify sama di kedua
+mode; di mode batch mask_pixels diskalakan dari ROI yang diperkecil ke luas
+ROI asli, jadi nilainya perkiraan.
+
+Endpoint:
+    POST /classify          body = bytes JPEG/PNG, ?all=1 untuk semua wajah
+    GET  /health            status server dan antrean
+    GET  /metrics           metrics format Prometheus
+    GET  /assets/<file>     aset statis dari assets.py (nama berbasis hash, cache immutable)
+    GET  /assets/<path>     aset per path sumber, WebP jika klien menerimanya
+
+Contoh:
+    python server.py --port 8080 --workers 4
+    curl --data-binary @foto.jpg http://127.0.0.1:8080/classify
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from assets import AssetStore
+from batching import MicroBatcher, classify_roi_batch
+from detector import DETECT_MAX_SIDE, DETECT_MIN_SIZE, detect_face, detect_faces, init_worker
+from exposure import check_exposure
+from ingest import INGEST_MAX_SIDE, decode_image
+from metrics import Metrics, process_rss
+from profiles import load_config
+from skin_tone import analysis_pixels, analyze, analyze_faces, resize_roi
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+# nama file aset berisi hash isinya, jadi boleh di-cache selamanya
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 422: 'Unprocessable Entity', 429: 'Too Many Requests',
+           500: 'Internal Server Error', 504: 'Gateway Timeout'}
+
+
+def classify_bytes(data, all_faces=False, config=None):
+    """Dijalankan di worker: decode, deteksi, klasifikasi; kembalikan (status, body dict)"""
+    try:
+        img = decode_image(data, max_side=INGEST_MAX_SIDE)
+    except Exception as e:
+        return 400, {'error': f"gambar tidak bisa dibaca: {e}"}
+    exposure = check_exposure(img)
+    if exposure.rejected:
+        return 422, {'error': exposure.message, 'exposure': exposure.status}
+
+    if all_faces:
+        faces = detect_faces(img, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+        results = analyze_faces(img, faces, config, exposure.correction)
+        return 200, {'faces': [r.to_dict() for r in results], 'exposure': exposure.status}
+
+    face = detect_face(img, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+    if face is None:
+        return 422, {'error': 'wajah tidak terdeteksi'}
+    return 200, {**analyze(img, face, config=config, correction=exposure.correction).to_dict(),
+                 'exposure': exposure.status}
+
+
+def extract_roi(data, roi_max_side=128, config=None):
+    """Dijalankan di worker untuk mode batch
+
+    Kembalikan (status, (roi, box, info) atau body error); info berisi status
+    pre-check dan jumlah piksel ROI sebelum diperkecil.
+    """
+    try:
+        img = decode_image(data, max_side=INGEST_MAX_SIDE)
+    except Exception as e:
+        return 400, {'error': f"gambar tidak bisa dibaca: {e}"}
+    exposure = check_exposure(img)
+    if exposure.rejected:
+        return 422, {'error': exposure.message, 'exposure': exposure.status}
+    face = detect_face(img, min_size=DETECT_MIN_SIZE, max_side=DETECT_MAX_SIDE)
+    if face is None:
+        return 422, {'error': 'wajah tidak terdeteksi'}
+    box = tuple(int(c) for c in face)
+    # salin supaya yang dikirim balik ke proses utama hanya ROI kecil, bukan seluruh gambar
+    roi = analysis_pixels(img, box, config)
+    if exposure.correction is not None:
+        roi = exposure.correction.apply(roi)
+    pixels = roi.shape[0] * roi.shape[1]
+    # hasil regions='cheeks' atau sampling 'random' berupa satu baris piksel, tidak diperkecil lagi
+    if roi_max_side and roi.shape[0] > 1:
+        roi = resize_roi(roi, roi_max_side)
+    return 200, (roi.copy(), box, {'exposure': exposure.status, 'pixels': pixels})
+
+
+class InferenceServer:
+    def __init__(self, workers=None, queue_size=None, timeout=10.0, metrics=None,
+                 batch_size=1, batch_wait_ms=5.0, roi_max_side=128, config=None, assets=None):
+        self.workers = workers or os.cpu_count() or 1
+        # request yang sedang diproses + menunggu worker; di mode batch harus muat minimal satu batch penuh
+        self.queue_size = queue_size or max(self.workers, batch_size) * 2
+        if batch_size > self.queue_size:
+            raise ValueError(f"batch_size {batch_size} lebih besar dari queue_size {self.queue_size}, "
+                             f"batch tidak akan pernah penuh")
+        self.timeout = timeout
+        self.metrics = metrics or Metrics(enabled=True)
+        self.pool = None
+        self.in_flight = 0
+        self.started = time.time()
+        self.roi_max_side = roi_max_side
+        self.config = config
+        self.assets = assets
+        self.batcher = (MicroBatcher(partial(classify_roi_batch, config=config), max_batch=batch_size,
+                                     max_wait_ms=batch_wait_ms)
+                        if batch_size > 1 else None)
+
+    def start_pool(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        # panaskan worker supaya request pertama tidak menanggung biaya start
+        for future in [self.pool.submit(init_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def classify(self, body, query):
+        if not body:
+            return 400, {'error': 'body kosong, kirim bytes gambar'}
+        if self.in_flight >= self.queue_size:
+            self.metrics.inc('requests', status='429')
+            return 429, {'error': 'server sibuk, coba lagi'}
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        jobs = []
+        try:
+            all_faces = query.get('all', ['0'])[0] not in ('0', '', 'false')
+            status, payload = await asyncio.wait_for(self._classify(body, all_faces, jobs), self.timeout)
+        except asyncio.TimeoutError:
+            status, payload = 504, {'error': f"melebihi batas waktu {self.timeout} s"}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            self._release_after(jobs)
+        self.metrics.observe('request', (time.perf_counter() - start) * 1000)
+        self.metrics.inc('requests', status=str(status))
+        if status == 200 and 'label' in payload:
+            self.metrics.inc('labels', label=payload['label'])
+        return status, payload
+
+    def _release_after(self, jobs):
+        """Lepas slot in-flight setelah job terakhir di worker selesai
+
+        Timeout hanya membatalkan coroutine; job yang sudah berjalan di
+        worker tetap jalan sampai selesai, jadi slotnya baru dilepas dari
+        done-callback future job tersebut.
+        """
+        def release(_=None):
+            self.in_flight -= 1
+
+        if not jobs:
+            release()
+            return
+        loop = asyncio.get_running_loop()
+        jobs[-1].add_done_callback(lambda _: loop.call_soon_threadsafe(release))
+
+    def _submit(self, jobs, fn, *args):
+        """Kirim fn ke pool; future-nya dicatat di jobs untuk _release_after"""
+        job = self.pool.submit(fn, *args)
+        jobs.append(job)
+        return asyncio.wrap_future(job)
+
+    async def _classify(self, body, all_faces, jobs):
+        if self.batcher is None or all_faces:
+            return await self._submit(jobs, classify_bytes, body, all_faces, self.config)
+        status, payload = await self._submit(jobs, extract_roi, body, self.roi_max_side, self.config)
+        if status != 200:
+            return status, payload
+        roi, box, info = payload
+        body = (await self.batcher.submit((roi, box))).to_dict()
+        # samakan skema dengan classify_bytes: mask_pixels dalam luas ROI asli
+        body['mask_pixels'] = round(body['mask_pixels'] * info['pixels'] / max(roi.shape[0] * roi.shape[1], 1))
+        body['exposure'] = info['exposure']
+        return 200, body
+
+    def health(self):
+        body = {
+            'status': 'ok',
+            'workers': self.workers,
+            'in_flight': self.in_flight,
+            'queue_size': self.queue_size,
+            'uptime_s': round(time.time() - self.started, 1),
+            'memory': process_rss(),
+        }
+        if self.batcher is not None:
+            body['batching'] = self.batcher.stats()
+        return 200, body
+
+    def asset(self, name, headers):
+        """Kembalikan (status, payload, content_type, header tambahan) untuk GET /assets/<name>"""
+        if self.assets is None:
+            return 404, {'error': 'aset tidak tersedia'}, 'application/json', {}
+        if name == 'manifest.json':
+            return 200, self.assets.manifest, 'application/json', {'Cache-Control': 'no-cache'}
+        extra = {'Cache-Control': IMMUTABLE}
+        if name not in self.assets.files:
+            # path sumber (images/...): pilih varian sesuai Accept, URL-nya tidak berbasis hash
+            entry = self.assets.manifest['assets'].get(name)
+            if entry is None:
+                return 404, {'error': 'tidak ditemukan'}, 'application/json', {}
+            webp = 'image/webp' in headers.get('accept', '')
+            name = entry['variants']['webp' if webp else 'fallback']['file']
+            extra = {'Cache-Control': 'public, max-age=3600', 'Vary': 'Accept'}
+        data, mime = self.assets.file(name)
+        etag = f'"{name.split(".")[0]}"'
+        extra['ETag'] = etag
+        if etag in headers.get('if-none-match', ''):
+            return 304, b'', mime, extra
+        return 200, data, mime, extra
+
+    async def handle(self, reader, writer):
+        """Satu koneksi HTTP/1.1, mendukung keep-alive"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+                content_type = 'application/json'
+                extra = {}
+                head_only = False
+
+                if isinstance(body, int):
+                    status, payload = body, {'error': REASONS[body]}
+                elif url.path == '/classify':
+                    if method != 'POST':
+                        status, payload = 405, {'error': 'gunakan POST'}
+                    else:
+                        status, payload = await self.classify(body, query)
+                elif url.path == '/health' and method == 'GET':
+                    status, payload = self.health()
+                elif url.path == '/metrics' and method == 'GET':
+                    status, payload = 200, self.metrics.prometheus()
+                    content_type = 'text/plain; version=0.0.4'
+                elif url.path.startswith('/assets/') and method in ('GET', 'HEAD'):
+                    status, payload, content_type, extra = self.asset(url.path[len('/assets/'):], headers)
+                    head_only = method == 'HEAD'
+                else:
+                    status, payload = 404, {'error': 'tidak ditemukan'}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if status == 429:
+                    extra['Retry-After'] = '1'
+                await _write_response(writer, status, payload, content_type, keep_alive, extra, head_only)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_request(reader):
+    """Baca satu request; body berupa kode status int jika request tidak valid"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        return 'GET', '/', {'connection': 'close'}, 400
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        return 'GET', '/', {'connection': 'close'}, 400
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        # body tidak bisa dibatasi, jadi koneksi tidak bisa dipakai ulang
+        headers['connection'] = 'close'
+        return method, target, headers, 400
+    if length > MAX_BODY_BYTES:
+        headers['connection'] = 'close'
+        return method, target, headers, 413
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+async def _write_response(writer, status, payload, content_type, keep_alive, extra_headers, head_only=False):
+    """Tulis satu response; untuk HEAD hanya header, Content-Length tetap dari body yang akan dikirim"""
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+    headers = {
+        'Content-Type': content_type,
+        'Content-Length': str(len(body)),
+        'Connection': 'keep-alive' if keep_alive else 'close',
+        **extra_headers,
+    }
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+    head += ''.join(f"{k}: {v}\r\n" for k, v in headers.items()) + '\r\n'
+    writer.write(head.encode('latin-1') + (b'' if head_only else body))
+    await writer.drain()
+
+
+async def serve(host, port, server):
+    server.start_pool()
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"melayani di http://{host}:{port} ({server.workers} worker, antrean {server.queue_size})")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--queue-size', type=int, help='batas request aktif (default: 2x maks(worker, batch-size))')
+    parser.add_argument('--timeout', type=float, default=10.0, help='batas waktu per request (detik)')
+    parser.add_argument('--batch-size', type=int, default=1, help='> 1 untuk micro-batching analisis ROI')
+    parser.add_argument('--batch-wait-ms', type=float, default=5.0)
+    parser.add_argument('--roi-max-side', type=int, default=128, help='0 untuk ROI resolusi penuh')
+    parser.add_argument('--profile', help='nama profil di profiles.json (default: profil aktif)')
+    parser.add_argument('--no-assets', action='store_true', help='jangan layani /assets')
+    args = parser.parse_args(argv)
+
+    assets = None if args.no_assets else AssetStore.load()
+
+    try:
+        server = InferenceServer(workers=args.workers, queue_size=args.queue_size, timeout=args.timeout,
+                                 batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms,
+                                 roi_max_side=args.roi_max_side, config=load_config(args.profile),
+                                 assets=assets)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
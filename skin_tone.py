@@ -0,0 +1,485 @@
+"""Inti analisis skin tone (tanpa Streamlit, tanpa efek samping saat import)"""
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from detector import detect_face
+
+UNKNOWN = "An Unknown Skin Tone"
+LABELS = ("FAIR", "LIGHT", "MEDIUM", "DARK")
+
+# H mentah OpenCV -> hue derajat: (H*2) mod 256, karena hsv[..., 0]*2 pada uint8 overflow
+HUE_DEGREES = ((np.arange(256) * 2) & 0xFF).astype(np.uint8)
+
+
+@dataclass(frozen=True)
+class AnalysisConfig:
+    """Parameter analisis: cara mengambil ROI, rentang mask kulit, dan batas kelas"""
+    roi: str = 'face'  # 'face': 60% tengah kotak wajah, 'center': 50% tengah gambar
+    mask_h: tuple = (0, 50)
+    mask_s: tuple = (10, 150)
+    mask_v: tuple = (20, 255)
+    min_pixels: int = 50
+    # batas kelas: (label, (h_min, h_max), (s_min, s_max), (v_min, v_max)), dicek berurutan dengan
+    # h_min <= H <= h_max, s_min <= S <= s_max, v_min < V <= v_max; isinya hanya dari profiles.json
+    thresholds: tuple = ()
+    # 'full': semua piksel ROI, 'stride': grid teratur, 'random': acak tetap (seed dari ukuran ROI)
+    sampling: str = 'full'
+    pixel_budget: int = 16384  # batas piksel untuk 'stride'/'random'
+    regions: str = 'box'  # roi='face' saja: 'box' = roi di atas, 'cheeks' = dahi + kedua pipi
+
+
+@lru_cache(maxsize=1)
+def default_config():
+    """AnalysisConfig profil aktif di profiles.json, dipakai jika config tidak diberikan"""
+    from profiles import load_config  # profiles mengimpor modul ini
+    return load_config()
+
+
+@dataclass
+class SkinToneResult:
+    label: str
+    h: float
+    s: float
+    v: float
+    mask_pixels: int
+    face: tuple = None
+    timings: dict = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def face_roi(image, face_coords):
+    """Ambil 60% bagian tengah kotak wajah"""
+    x, y, w, h = face_coords
+    img_np = np.asarray(image)
+    return img_np[y+h//5:y+h*4//5, x+w//5:x+w*4//5]
+
+
+def center_roi(image):
+    """Ambil 50% bagian tengah gambar"""
+    img_np = np.asarray(image)
+    height, width = img_np.shape[:2]
+    top, left = height // 4, width // 4
+    return img_np[top:top + height // 2, left:left + width // 2]
+
+
+# wilayah untuk regions='cheeks', pecahan kotak wajah (x0, y0, x1, y1),
+# menjauhi mata, alis, hidung dan mulut
+FACE_REGIONS = (
+    (0.30, 0.08, 0.70, 0.22),  # dahi
+    (0.15, 0.50, 0.35, 0.70),  # pipi kiri
+    (0.65, 0.50, 0.85, 0.70),  # pipi kanan
+)
+
+
+def face_regions(image, face_coords):
+    """Potongan dahi dan kedua pipi dari kotak wajah (view, tanpa salinan)"""
+    x, y, w, h = face_coords
+    img_np = np.asarray(image)
+    return [img_np[y + int(h * y0):y + int(h * y1), x + int(w * x0):x + int(w * x1)]
+            for x0, y0, x1, y1 in FACE_REGIONS]
+
+
+def sample_pixels(roi, budget, mode='stride'):
+    """Kurangi ROI menjadi paling banyak budget piksel
+
+    'stride' mengambil grid teratur (view, tanpa salinan) yang menutupi
+    seluruh ROI; 'random' mengambil posisi acak dengan seed dari ukuran ROI
+    supaya hasil untuk gambar yang sama selalu sama. ROI yang sudah cukup
+    kecil, mode 'full' atau budget <= 0 dikembalikan apa adanya.
+    """
+    roi = np.asarray(roi)
+    height, width = roi.shape[:2]
+    n = height * width
+    if mode == 'full' or budget <= 0 or n <= budget:
+        return roi
+    if mode == 'stride':
+        step = math.ceil(math.sqrt(n / budget))
+        return roi[step // 2::step, step // 2::step]
+    if mode != 'random':
+        raise ValueError(f"sampling tidak dikenal: {mode}")
+    flat = np.sort(np.random.default_rng(n).integers(0, n, budget))
+    return roi[flat // width, flat % width][None]
+
+
+def analysis_pixels(image, face_coords=None, config=None):
+    """Piksel RGB yang dianalisis sesuai config.roi, regions dan sampling, berbentuk (h, w, 3)"""
+    config = default_config() if config is None else config
+    img_np = np.asarray(image)
+    budget = config.pixel_budget if config.sampling != 'full' else 0
+    if config.roi != 'face':
+        return sample_pixels(center_roi(img_np), budget, config.sampling)
+    if config.regions == 'box':
+        return sample_pixels(face_roi(img_np, face_coords), budget, config.sampling)
+    if config.regions != 'cheeks':
+        raise ValueError(f"regions tidak dikenal: {config.regions}")
+    parts = face_regions(img_np, face_coords)
+    total = sum(part.shape[0] * part.shape[1] for part in parts) or 1
+    # budget dibagi sebanding luas tiap wilayah
+    parts = [sample_pixels(part, budget * part.shape[0] * part.shape[1] // total, config.sampling)
+             for part in parts] if budget else parts
+    return np.concatenate([part.reshape(-1, 3) for part in parts])[None]
+
+
+def resize_roi(roi, max_side):
+    """Perkecil ROI (INTER_AREA) sehingga sisi terpanjangnya paling besar max_side"""
+    rh, rw = roi.shape[:2]
+    scale = max_side / max(rh, rw, 1)
+    if scale >= 1.0:
+        return roi
+    return cv2.resize(roi, (max(1, round(rw * scale)), max(1, round(rh * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+@lru_cache(maxsize=None)
+def _hue_runs(h_min, h_max):
+    """Rentang nilai H mentah OpenCV (0-255) yang lolos mask hue dalam derajat
+
+    Hue derajat mengikuti HUE_DEGREES, jadi satu rentang derajat bisa menjadi
+    beberapa rentang H mentah.
+    """
+    ok = ((h_min <= HUE_DEGREES) & (HUE_DEGREES <= h_max)).tolist()
+    runs, start = [], None
+    for raw, flag in enumerate(ok + [False]):
+        if flag and start is None:
+            start = raw
+        elif not flag and start is not None:
+            runs.append((start, raw - 1))
+            start = None
+    return tuple(runs)
+
+
+def skin_mask(hsv, config=None):
+    """Mask kulit uint8 (0/255) dalam satu pass cv2.inRange per rentang hue"""
+    config = default_config() if config is None else config
+    s_lo, s_hi = max(0, config.mask_s[0]), min(255, config.mask_s[1])
+    v_lo, v_hi = max(0, config.mask_v[0]), min(255, config.mask_v[1])
+    mask = None
+    for h_lo, h_hi in _hue_runs(*config.mask_h):
+        part = cv2.inRange(hsv, (h_lo, s_lo, v_lo), (h_hi, s_hi, v_hi))
+        mask = part if mask is None else cv2.bitwise_or(mask, part, dst=mask)
+    if mask is None:
+        mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    return mask
+
+
+def histogram_median(hist):
+    """Median dari histogram 256 bin, sama dengan np.median pada data aslinya"""
+    cumsum = np.cumsum(hist)
+    n = int(cumsum[-1])
+    if n == 0:
+        return float('nan')
+    upper = int(np.searchsorted(cumsum, n // 2, side='right'))
+    if n % 2:
+        return float(upper)
+    lower = int(np.searchsorted(cumsum, n // 2 - 1, side='right'))
+    return (lower + upper) / 2
+
+
+def histogram_medians(hists):
+    """Median tiap baris dari histogram (N, 256) sekaligus, NaN untuk baris kosong"""
+    cumsum = np.cumsum(hists, axis=1)
+    n = cumsum[:, -1].astype(np.int64)
+    # indeks pertama dengan cumsum > k, sama seperti searchsorted(..., side='right')
+    upper = (cumsum <= (n // 2)[:, None]).sum(axis=1)
+    lower = (cumsum <= (n // 2 - 1)[:, None]).sum(axis=1)
+    medians = np.where(n % 2 == 1, upper, (lower + upper) / 2).astype(np.float64)
+    medians[n == 0] = np.nan
+    return medians
+
+
+def hsv_stats(roi, config=None, timings=None):
+    """Median H (0-360), S, V dari piksel kulit pada ROI, beserta jumlah piksel mask"""
+    config = default_config() if config is None else config
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    # ROI berupa view dengan stride baris, cvtColor bisa membacanya tanpa salinan
+    face_used = np.asarray(roi, dtype=np.uint8)
+    hsv = cv2.cvtColor(face_used, cv2.COLOR_RGB2HSV)
+    timings['hsv_ms'] = (time.perf_counter() - start) * 1000
+
+    # filter hanya warna kulit
+    start = time.perf_counter()
+    mask = skin_mask(hsv, config)
+    mask_pixels = cv2.countNonZero(mask)
+
+    # Jika data terlalu sedikit, fallback ke semua pixel
+    if mask_pixels < config.min_pixels:
+        mask = None
+    timings['mask_ms'] = (time.perf_counter() - start) * 1000
+
+    # Median lewat histogram 256 bin, tanpa menyalin dan mengurutkan piksel
+    start = time.perf_counter()
+    hists = [cv2.calcHist([hsv], [c], mask, [256], [0, 256]).ravel().astype(np.int64)
+             for c in range(3)]
+    hue_hist = np.bincount(HUE_DEGREES, weights=hists[0], minlength=256)
+    avg_h = histogram_median(hue_hist)
+    avg_s = histogram_median(hists[1])
+    avg_v = histogram_median(hists[2])
+    timings['median_ms'] = (time.perf_counter() - start) * 1000
+    return avg_h, avg_s, avg_v, mask_pixels
+
+
+def _classify_chain(avg_h, avg_s, avg_v, thresholds):
+    """Rantai if/elif asli, dipakai untuk nilai yang bukan kelipatan 0.5"""
+    for label, (h_min, h_max), (s_min, s_max), (v_min, v_max) in thresholds:
+        if h_min <= avg_h <= h_max and s_min <= avg_s <= s_max and v_min < avg_v <= v_max:
+            return label
+    return UNKNOWN
+
+
+class ThresholdLUT:
+    """Batas kelas yang dikompilasi menjadi tabel lookup
+
+    Median dari histogram selalu kelipatan 0.5 di 0-255, jadi tiap sumbu
+    dikuantisasi ke 511 langkah setengah; isi tabel sumbu adalah bitmask kelas
+    yang rentangnya memuat nilai itu, dan tabel first memetakan gabungan
+    bitmask ke kelas pertama sesuai urutan thresholds. Untuk voting per piksel,
+    pixel_table adalah tabel padat 256x256x256 yang diindeks langsung dengan
+    H, S, V mentah dari cv2.cvtColor.
+    """
+    STEPS = 511  # 0, 0.5, ..., 255
+
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+        count = len(thresholds)
+        if count > 16:
+            raise ValueError(f"maksimal 16 kelas, didapat {count}")
+        self.labels = tuple(label for label, *_ in thresholds) + (UNKNOWN,)
+        self.unknown = count
+        self.dtype = np.uint8 if count <= 8 else np.uint16
+
+        values = np.arange(self.STEPS) / 2
+        bits = (1 << np.arange(count)).astype(self.dtype)[:, None]
+        (h_lo, h_hi), (s_lo, s_hi), (v_lo, v_hi) = (
+            np.array([t[axis] for _, *t in thresholds], dtype=np.float64).reshape(count, 2).T[:, :, None]
+            for axis in range(3))
+        self.h_bits = np.bitwise_or.reduce(np.where((h_lo <= values) & (values <= h_hi), bits, 0),
+                                           axis=0).astype(self.dtype)
+        self.s_bits = np.bitwise_or.reduce(np.where((s_lo <= values) & (values <= s_hi), bits, 0),
+                                           axis=0).astype(self.dtype)
+        self.v_bits = np.bitwise_or.reduce(np.where((v_lo < values) & (values <= v_hi), bits, 0),
+                                           axis=0).astype(self.dtype)
+
+        combos = np.arange(1 << count)
+        self.first = np.full(1 << count, self.unknown, dtype=np.uint8)
+        for i in reversed(range(count)):
+            self.first[(combos >> i) & 1 == 1] = i
+        self._pixel_table = None
+        # versi list untuk jalur skalar, indeks list lebih cepat dari indeks numpy per elemen
+        self._scalar = (self.h_bits.tolist(), self.s_bits.tolist(), self.v_bits.tolist(),
+                        self.first.tolist())
+
+    def classify(self, avg_h, avg_s, avg_v):
+        h_bits, s_bits, v_bits, first = self._scalar
+        try:
+            ih, is_, iv = avg_h * 2, avg_s * 2, avg_v * 2
+            if ih == int(ih) and is_ == int(is_) and iv == int(iv):
+                ih, is_, iv = int(ih), int(is_), int(iv)
+                if 0 <= ih < self.STEPS and 0 <= is_ < self.STEPS and 0 <= iv < self.STEPS:
+                    return self.labels[first[h_bits[ih] & s_bits[is_] & v_bits[iv]]]
+        except (ValueError, OverflowError):  # NaN / inf
+            pass
+        return _classify_chain(avg_h, avg_s, avg_v, self.thresholds)
+
+    def codes(self, h, s, v):
+        """Kode kelas (indeks ke labels) untuk array median"""
+        idx = [np.asarray(c, dtype=np.float64) * 2 for c in (h, s, v)]
+        exact = np.ones(idx[0].shape, dtype=bool)
+        for c in idx:
+            with np.errstate(invalid='ignore'):
+                exact &= (c == np.floor(c)) & (c >= 0) & (c < self.STEPS)
+        safe = [np.where(exact, c, 0).astype(np.intp) for c in idx]
+        codes = self.first[self.h_bits[safe[0]] & self.s_bits[safe[1]] & self.v_bits[safe[2]]]
+        if not exact.all():
+            lookup = {label: i for i, label in enumerate(self.labels)}
+            for i in np.flatnonzero(~exact):
+                label = _classify_chain(float(h[i]), float(s[i]), float(v[i]), self.thresholds)
+                codes[i] = lookup[label]
+        return codes
+
+    def classify_many(self, h, s, v):
+        return np.array(self.labels, dtype=object)[self.codes(h, s, v)]
+
+    @property
+    def pixel_table(self):
+        """Tabel padat (H mentah, S, V) -> kode kelas, dibuat saat pertama dipakai (16 MB)"""
+        if self._pixel_table is None:
+            # hue derajat sama seperti pada median, lalu ke indeks langkah setengah
+            hue = HUE_DEGREES.astype(np.intp) * 2
+            h_bits = self.h_bits[hue]
+            s_bits = self.s_bits[np.arange(256) * 2]
+            v_bits = self.v_bits[np.arange(256) * 2]
+            self._pixel_table = self.first[h_bits[:, None, None] & s_bits[None, :, None]
+                                           & v_bits[None, None, :]]
+        return self._pixel_table
+
+    def pixel_codes(self, hsv):
+        """Kode kelas per piksel dari array HSV uint8 OpenCV"""
+        return self.pixel_table[hsv[..., 0], hsv[..., 1], hsv[..., 2]]
+
+
+@lru_cache(maxsize=16)
+def compile_thresholds(thresholds):
+    return ThresholdLUT(thresholds)
+
+
+def classify_hsv(avg_h, avg_s, avg_v, thresholds=None):
+    """Tentukan skin tone dari median HSV"""
+    thresholds = default_config().thresholds if thresholds is None else thresholds
+    return compile_thresholds(thresholds).classify(avg_h, avg_s, avg_v)
+
+
+def classify_many(h, s, v, thresholds=None):
+    """Versi vektor dari classify_hsv untuk array median"""
+    thresholds = default_config().thresholds if thresholds is None else thresholds
+    return compile_thresholds(thresholds).classify_many(h, s, v)
+
+
+def pixel_votes(roi, config=None):
+    """Proporsi piksel kulit ROI untuk tiap label, memakai tabel padat yang sama"""
+    config = default_config() if config is None else config
+    hsv = cv2.cvtColor(np.asarray(roi, dtype=np.uint8), cv2.COLOR_RGB2HSV)
+    mask = skin_mask(hsv, config)
+    lut = compile_thresholds(config.thresholds)
+    codes = lut.pixel_codes(hsv)
+    if cv2.countNonZero(mask) >= config.min_pixels:
+        codes = codes[mask > 0]
+    counts = np.bincount(codes.ravel(), minlength=len(lut.labels))
+    total = counts.sum()
+    return {label: (int(n) / total if total else 0.0) for label, n in zip(lut.labels, counts)}
+
+
+# matriks lipat histogram H mentah -> hue derajat
+_HUE_FOLD = np.zeros((256, 256), dtype=np.float32)
+_HUE_FOLD[np.arange(256), HUE_DEGREES] = 1
+
+# calcHist memakai indeks wajah sebagai kanal uint8
+MAX_BATCH_FACES = 255
+
+
+def analyze_faces(image, faces, config=None, correction=None):
+    """Analisis banyak wajah sekaligus, kembalikan list SkinToneResult sesuai urutan faces
+
+    Piksel semua ROI digabung menjadi satu baris sehingga konversi HSV, mask
+    dan histogram berjalan sekali untuk seluruh wajah; indeks wajah menjadi
+    dimensi pertama histogram 2D dari cv2.calcHist.
+    """
+    config = default_config() if config is None else config
+    img_np = np.asarray(image)
+    boxes = [tuple(int(c) for c in face) for face in faces]
+    if len(boxes) > MAX_BATCH_FACES:
+        return (analyze_faces(img_np, boxes[:MAX_BATCH_FACES], config, correction)
+                + analyze_faces(img_np, boxes[MAX_BATCH_FACES:], config, correction))
+    if not boxes:
+        return []
+    rois = [analysis_pixels(img_np, box, config) for box in boxes]
+    if correction is not None:
+        rois = [correction.apply(roi) for roi in rois]
+    return _analyze_rois(boxes, rois, config)
+
+
+def analyze_rois(rois, boxes=None, config=None):
+    """Seperti analyze_faces, tapi untuk ROI yang sudah dipotong (boleh dari gambar berbeda)
+
+    config.sampling tetap diterapkan ke tiap ROI; config.regions tidak,
+    karena wilayah wajah harus dipotong dari gambar aslinya (analysis_pixels).
+    """
+    config = default_config() if config is None else config
+    budget = config.pixel_budget if config.sampling != 'full' else 0
+    rois = [sample_pixels(np.asarray(roi, dtype=np.uint8), budget, config.sampling) for roi in rois]
+    boxes = list(boxes) if boxes is not None else [None] * len(rois)
+    results = []
+    for i in range(0, len(rois), MAX_BATCH_FACES):
+        results += _analyze_rois(boxes[i:i + MAX_BATCH_FACES], rois[i:i + MAX_BATCH_FACES], config)
+    return results
+
+
+def _analyze_rois(boxes, rois, config):
+    timings = {}
+    started = time.perf_counter()
+    count = len(rois)
+
+    start = time.perf_counter()
+    sizes = [roi.shape[0] * roi.shape[1] for roi in rois]
+    pixels = np.concatenate([roi.reshape(-1, 3) for roi in rois] + [np.zeros((1, 3), np.uint8)])[None]
+    # satu piksel dummy di akhir supaya array tidak pernah kosong, diberi indeks di luar rentang
+    face_idx = np.repeat(np.arange(count + 1, dtype=np.uint8), sizes + [1])[None]
+    timings['roi_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    hsv = cv2.cvtColor(pixels, cv2.COLOR_RGB2HSV)
+    timings['hsv_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    mask = skin_mask(hsv, config)
+    timings['mask_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    ranges = [0, count, 0, 256]
+    hists = [cv2.calcHist([face_idx, hsv], [0, 1 + c], mask, [count, 256], ranges) for c in range(3)]
+    mask_pixels = hists[1].sum(axis=1).astype(np.int64)
+    # wajah dengan piksel kulit terlalu sedikit memakai semua pikselnya
+    fallback = mask_pixels < config.min_pixels
+    if fallback.any():
+        lut = np.zeros(256, dtype=np.uint8)
+        lut[:count][fallback] = 255
+        all_mask = cv2.LUT(face_idx, lut)
+        for c in range(3):
+            hists[c][fallback] = cv2.calcHist([face_idx, hsv], [0, 1 + c], all_mask, [count, 256], ranges)[fallback]
+    h_hist = hists[0] @ _HUE_FOLD
+    avg_h, avg_s, avg_v = (histogram_medians(hist.astype(np.int64))
+                           for hist in (h_hist, hists[1], hists[2]))
+    timings['median_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    labels = classify_many(avg_h, avg_s, avg_v, config.thresholds)
+    timings['classify_ms'] = (time.perf_counter() - start) * 1000
+    timings['total_ms'] = (time.perf_counter() - started) * 1000
+
+    return [
+        SkinToneResult(str(labels[i]), float(avg_h[i]), float(avg_s[i]), float(avg_v[i]),
+                       int(mask_pixels[i]), boxes[i], timings)
+        for i in range(count)
+    ]
+
+
+def analyze(image, face_coords=None, config=None, correction=None, **detect_kwargs):
+    """Analisis lengkap satu gambar RGB
+
+    Untuk roi='face' dan face_coords kosong, wajah dideteksi dulu dengan
+    detector.detect_face (detect_kwargs diteruskan). Mengembalikan None jika
+    wajah tidak ditemukan. correction (exposure.Correction) diterapkan ke
+    piksel ROI saja sebelum konversi HSV.
+    """
+    config = default_config() if config is None else config
+    timings = {}
+    started = time.perf_counter()
+    img_np = np.asarray(image)
+
+    if config.roi == 'face':
+        if face_coords is None:
+            face_coords = detect_face(img_np, timings=timings, **detect_kwargs)
+            if face_coords is None:
+                return None
+        face_coords = tuple(int(c) for c in face_coords)
+    start = time.perf_counter()
+    roi = analysis_pixels(img_np, face_coords, config)
+    if correction is not None:
+        roi = correction.apply(roi)
+    timings['roi_ms'] = (time.perf_counter() - start) * 1000
+
+    avg_h, avg_s, avg_v, mask_pixels = hsv_stats(roi, config, timings)
+
+    start = time.perf_counter()
+    label = classify_hsv(avg_h, avg_s, avg_v, config.thresholds)
+    timings['classify_ms'] = (time.perf_counter() - start) * 1000
+    timings['total_ms'] = (time.perf_counter() - started) * 1000
+    return SkinToneResult(label, avg_h, avg_s, avg_v, mask_pixels, face_coords, timings)
+
@@ -0,0 +1,137 @@
+"""Laporan waktu import dan cold start aplikasi Streamlit
+
+Tiap pengukuran berjalan di proses Python baru: import streamlit, run pertama
+script (halaman default, Description Site) lewat AppTest, lalu biaya yang
+dibayar saat halaman Detector pertama kali memproses foto (import modul
+OpenCV + load cascade). Waktu run diukur dari dalam script supaya polling
+dan scan komponen milik AppTest tidak ikut terhitung. Dengan --rev, versi
+script di revisi git itu ikut diukur sebagai pembanding.
+
+Contoh:
+    python startup_report.py
+    python startup_report.py --rev HEAD~1 --repeat 5 --importtime 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+HEAVY = ('cv2', 'numpy', 'PIL.Image', 'detector', 'skin_tone', 'ingest', 'profiles')
+ENGINE = ('detector', 'skin_tone', 'ingest', 'profiles')
+
+# dibungkus di sekitar source script: waktu eksekusi body disimpan di builtins
+_PROLOGUE = "import builtins as _sr_builtins, time as _sr_time\n_sr_start = _sr_time.perf_counter()\n"
+_EPILOGUE = "\n_sr_builtins._startup_run_ms = (_sr_time.perf_counter() - _sr_start) * 1000\n"
+
+
+def child(app):
+    """Dijalankan di proses baru, cetak hasil sebagai JSON"""
+    import time
+    start = time.perf_counter()
+    import streamlit
+    from streamlit.testing.v1 import AppTest
+    import_ms = (time.perf_counter() - start) * 1000
+
+    # mesin AppTest sendiri (pandas, dll.) dihangatkan dulu dengan script kosong
+    AppTest.from_string('import streamlit as st\nst.write("")').run()
+    import builtins
+    source = Path(app).read_text(encoding='utf-8')
+    at = AppTest.from_string(_PROLOGUE + source + _EPILOGUE, default_timeout=120).run()
+    run_ms = getattr(builtins, '_startup_run_ms', float('nan'))
+    loaded = [name for name in HEAVY if name in sys.modules]
+
+    # biaya pertama kali halaman Detector memproses foto
+    start = time.perf_counter()
+    import importlib
+    for name in ENGINE:
+        importlib.import_module(name)
+    from detector import CascadeRegistry
+    CascadeRegistry().warm()
+    detector_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({'import_ms': import_ms, 'first_run_ms': run_ms, 'detector_first_use_ms': detector_ms,
+                      'loaded': loaded, 'exceptions': len(at.exception)}))
+
+
+def measure(app, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [__file__, '--child', app]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if importtime:
+        result['imports'] = _parse_importtime(proc.stderr)
+    return result
+
+
+def _parse_importtime(stderr):
+    """Modul tingkat atas dengan waktu kumulatif terbesar (mikrodetik -> ms)"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # hanya baris tingkat atas (tanpa indentasi tambahan) yang mewakili satu import langsung
+        name = name[1:]
+        if not name.startswith(' '):
+            totals[name] = totals.get(name, 0) + int(cumulative) / 1000
+    return sorted(totals.items(), key=lambda kv: -kv[1])
+
+
+def report(label, app, repeat, importtime):
+    runs = [measure(app) for _ in range(repeat)]
+    median = {key: statistics.median(r[key] for r in runs)
+              for key in ('import_ms', 'first_run_ms', 'detector_first_use_ms')}
+    print(f"{label}")
+    print(f"  import streamlit          {median['import_ms']:8.1f} ms")
+    print(f"  run pertama (Description) {median['first_run_ms']:8.1f} ms")
+    print(f"  cold start total          {median['import_ms'] + median['first_run_ms']:8.1f} ms")
+    print(f"  pertama kali Detector     {median['detector_first_use_ms']:8.1f} ms (modul OpenCV + cascade)")
+    print(f"  modul berat saat start    {', '.join(runs[0]['loaded']) or '-'}")
+    if any(r['exceptions'] for r in runs):
+        print("  PERINGATAN: script melempar exception")
+    if importtime:
+        imports = measure(app, importtime=True)['imports']
+        print("  import terbesar (kumulatif):")
+        for name, ms in imports[:importtime]:
+            print(f"    {name:<32} {ms:8.1f} ms")
+    return median
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='mainsec.py')
+    parser.add_argument('--rev', help='bandingkan dengan script di revisi git ini')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='tampilkan N import terbesar')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return
+
+    results = {}
+    if args.rev:
+        source = subprocess.run(['git', 'show', f"{args.rev}:{args.app}"], cwd=ROOT,
+                                capture_output=True, check=True).stdout
+        # disimpan di direktori repo supaya import modul lokal tetap sama
+        old_app = ROOT / f"_startup_{Path(args.app).stem}_old.py"
+        old_app.write_bytes(source)
+        try:
+            results['before'] = report(f"{args.app} @ {args.rev}", old_app.name, args.repeat, args.importtime)
+        finally:
+            os.remove(old_app)
+    results['after'] = report(f"{args.app} (working tree)", args.app, args.repeat, args.importtime)
+
+    if 'before' in results:
+        before, after = results['before'], results['after']
+        cold = lambda r: r['import_ms'] + r['first_run_ms']
+        print(f"cold start: {cold(before):.1f} -> {cold(after):.1f} ms "
+              f"({cold(after) - cold(before):+.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Gambar wajah sintetis untuk benchmark dan uji regresi (tanpa dataset foto)"""
+import cv2
+import numpy as np
+
+# Warna kulit target dalam (hue derajat, S, V), dipilih di dalam batas profil face-v1 (profiles.json)
+SKIN_TONES = {
+    "FAIR": (10, 50, 225),
+    "LIGHT": (16, 65, 190),
+    "MEDIUM": (20, 100, 145),
+    "DARK": (12, 140, 80),
+}
+
+RESOLUTIONS = {
+    "vga": (640, 480),
+    "hd": (1280, 720),
+    "fhd": (1920, 1080),
+    "12mp": (4032, 3024),
+}
+
+
+def hsv_to_rgb(hue_deg, s, v):
+    hsv = np.uint8([[[round(hue_deg / 2), s, v]]])
+    return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)[0, 0])
+
+
+def face_image(width, height, tone="MEDIUM", face_frac=0.45, noise=6, seed=0, background=(170, 230)):
+    """Buat gambar RGB berisi satu wajah sintetis, kembalikan (gambar, kotak wajah)
+
+    Wajah digambar sebagai elips warna kulit dengan mata, alis, hidung dan mulut
+    gelap sehingga pola terang-gelapnya mirip wajah frontal untuk Haar Cascade.
+    Latar berupa gradasi abu-abu (kiri, kanan) atau satu nilai abu-abu.
+    Kotak yang dikembalikan adalah kotak acuan (x, y, w, h).
+    """
+    rng = np.random.default_rng(seed)
+    skin = np.array(hsv_to_rgb(*SKIN_TONES.get(tone, tone)), dtype=np.float32)
+
+    # latar gradasi abu-abu
+    low, high = background if isinstance(background, tuple) else (background, background)
+    ramp = np.linspace(low, high, width, dtype=np.float32)
+    img = np.repeat(np.repeat(ramp[None, :, None], height, axis=0), 3, axis=2)
+
+    size = int(min(width, height) * face_frac)
+    cx, cy = width // 2, height // 2
+    x, y = cx - size // 2, cy - size // 2
+    axes = (int(size * 0.42), int(size * 0.52))
+
+    face_mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.ellipse(face_mask, (cx, cy), axes, 0, 0, 360, 255, -1)
+    img[face_mask > 0] = skin
+
+    dark = tuple(float(c) for c in skin * 0.25)
+    shadow = tuple(float(c) for c in skin * 0.7)
+    lip = tuple(float(c) for c in skin * np.array([0.75, 0.4, 0.4], dtype=np.float32))
+    eye_dx, eye_y = int(size * 0.18), cy - int(size * 0.08)
+    eye_axes = (int(size * 0.08), int(size * 0.04))
+    for side in (-1, 1):
+        ex = cx + side * eye_dx
+        cv2.ellipse(img, (ex, eye_y), eye_axes, 0, 0, 360, dark, -1)
+        cv2.ellipse(img, (ex, eye_y - int(size * 0.09)), (int(size * 0.1), int(size * 0.025)),
+                    0, 180, 360, dark, max(1, size // 60))
+    cv2.ellipse(img, (cx, cy + int(size * 0.08)), (int(size * 0.04), int(size * 0.1)),
+                0, 0, 360, shadow, -1)
+    cv2.ellipse(img, (cx, cy + int(size * 0.27)), (int(size * 0.14), int(size * 0.04)),
+                0, 0, 360, lip, -1)
+
+    img = cv2.GaussianBlur(img, (0, 0), max(1.0, size / 150))
+    if noise:
+        img += rng.normal(0, noise, img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    return img, (x, y, size, size)
+
+
+def corpus(resolutions=RESOLUTIONS, tones=SKIN_TONES, seed=0):
+    """Semua kombinasi resolusi x skin tone: yield (nama, gambar, kotak, tone)"""
+    for res_name, (width, height) in resolutions.items():
+        for i, tone in enumerate(tones):
+            img, box = face_image(width, height, tone, seed=seed + i)
+            yield f"{res_name}-{tone.lower()}", img, box, tone
@@ -0,0 +1,254 @@
+"""Klasifikasi skin tone berkelanjutan dari video (kamera atau file rekaman)
+
+Haar Cascade hanya dijalankan tiap N frame; di antaranya kotak wajah diikuti
+dengan template matching pada area sekitar kotak terakhir. N dimulai dari
+--detect-every dan disesuaikan dari biaya frame deteksi dan frame tracking
+(rata-rata bergerak) supaya biaya rata-rata per frame muat di --budget-ms;
+N turun lagi ke --detect-every begitu biayanya kembali di bawah budget.
+Median HSV dihaluskan dengan jendela bergulir supaya label tidak
+berganti-ganti.
+
+Contoh:
+    python video_stream.py rekaman.mp4 --detect-every 10 --budget-ms 40
+    python video_stream.py 0            # kamera pertama
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+
+from detector import detect_face
+from profiles import load_config
+from skin_tone import analysis_pixels, classify_hsv, default_config, hsv_stats, resize_roi
+
+MAX_DETECT_EVERY = 120
+# bobot frame terbaru pada rata-rata bergerak biaya deteksi/tracking
+COST_ALPHA = 0.2
+
+
+@dataclass
+class FrameResult:
+    index: int
+    face: tuple = None
+    source: str = None  # 'detect', 'track', atau None jika wajah hilang
+    label: str = None
+    h: float = None
+    s: float = None
+    v: float = None
+    latency_ms: float = 0.0
+    over_budget: bool = False
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class SkinToneTracker:
+    def __init__(self, detect_every=10, window=15, budget_ms=40.0, detect_max_side=480,
+                 min_size=(25, 25), track_scale=0.25, match_threshold=0.6,
+                 roi_max_side=128, config=None):
+        self.min_detect_every = detect_every
+        self.budget_ms = budget_ms
+        self.detect_kwargs = {'min_size': min_size, 'max_side': detect_max_side, 'refine': False}
+        self.track_scale = track_scale
+        self.match_threshold = match_threshold
+        self.roi_max_side = roi_max_side
+        self.config = default_config() if config is None else config
+        self.history = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.frame_index = 0
+        self.since_detect = 0
+        self.box = None
+        self.template = None
+        self.history.clear()
+        self.detect_every = self.min_detect_every
+        self.detect_ms = None
+        self.track_ms = None
+
+    def _small_gray(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        return cv2.resize(gray, None, fx=self.track_scale, fy=self.track_scale,
+                          interpolation=cv2.INTER_AREA)
+
+    def _set_template(self, small_gray, box):
+        x, y, w, h = (int(round(c * self.track_scale)) for c in box)
+        self.template = small_gray[y:y + h, x:x + w].copy() if w > 4 and h > 4 else None
+
+    def _track(self, small_gray):
+        """Cari template wajah di sekitar posisi terakhir, kembalikan kotak baru atau None"""
+        if self.template is None:
+            return None
+        th, tw = self.template.shape
+        x, y = (int(round(c * self.track_scale)) for c in self.box[:2])
+        # area pencarian: kotak terakhir diperluas setengah ukuran wajah ke tiap sisi
+        x0, y0 = max(0, x - tw // 2), max(0, y - th // 2)
+        x1 = min(small_gray.shape[1], x + tw + tw // 2)
+        y1 = min(small_gray.shape[0], y + th + th // 2)
+        search = small_gray[y0:y1, x0:x1]
+        if search.shape[0] < th or search.shape[1] < tw:
+            return None
+        scores = cv2.matchTemplate(search, self.template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (mx, my) = cv2.minMaxLoc(scores)
+        if best < self.match_threshold:
+            return None
+        w, h = self.box[2:]
+        return (int(round((x0 + mx) / self.track_scale)), int(round((y0 + my) / self.track_scale)), w, h)
+
+    def _roi_stats(self, frame, box):
+        roi = analysis_pixels(frame, box, self.config)
+        if roi.size == 0:
+            return None
+        # ROI diperkecil supaya biaya HSV tetap kecil berapa pun ukuran wajah
+        # (hasil regions/sampling 'random' berupa satu baris piksel dan sudah dibatasi budget)
+        if roi.shape[0] > 1:
+            roi = resize_roi(roi, self.roi_max_side)
+        return hsv_stats(roi, self.config)[:3]
+
+    def _observe_cost(self, detected, latency_ms):
+        attr = 'detect_ms' if detected else 'track_ms'
+        previous = getattr(self, attr)
+        setattr(self, attr, latency_ms if previous is None else previous + COST_ALPHA * (latency_ms - previous))
+
+    def _adapt(self):
+        """Pilih interval deteksi terkecil yang biaya rata-rata per frame-nya muat di budget
+
+        Dengan biaya deteksi D dan tracking T, rata-rata N frame adalah
+        (D + (N - 1) T) / N <= budget, jadi N >= (D - T) / (budget - T).
+        """
+        if self.detect_ms is None:
+            return
+        track_ms = self.track_ms or 0.0
+        if track_ms >= self.budget_ms:
+            needed = MAX_DETECT_EVERY
+        else:
+            needed = math.ceil((self.detect_ms - track_ms) / (self.budget_ms - track_ms))
+        self.detect_every = min(max(self.min_detect_every, needed), MAX_DETECT_EVERY)
+
+    def process(self, frame):
+        """Proses satu frame RGB"""
+        start = time.perf_counter()
+        result = FrameResult(self.frame_index)
+        self.frame_index += 1
+        small_gray = self._small_gray(frame)
+
+        box = None
+        detected = False
+        if self.box is not None and self.since_detect < self.detect_every:
+            box = self._track(small_gray)
+            if box is not None:
+                result.source = 'track'
+                self.since_detect += 1
+        if box is None:
+            found = detect_face(frame, **self.detect_kwargs)
+            detected = True
+            self.since_detect = 0
+            if found is not None:
+                box = tuple(int(c) for c in found)
+                result.source = 'detect'
+                self._set_template(small_gray, box)
+
+        self.box = box
+        if box is not None:
+            result.face = box
+            stats = self._roi_stats(frame, box)
+            if stats is not None:
+                self.history.append(stats)
+        else:
+            self.history.clear()
+
+        if self.history:
+            # median dari median per frame pada jendela bergulir
+            result.h, result.s, result.v = (float(c) for c in np.median(np.array(self.history), axis=0))
+            result.label = classify_hsv(result.h, result.s, result.v, self.config.thresholds)
+
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        result.over_budget = result.latency_ms > self.budget_ms
+        # frame tanpa wajah dan tanpa deteksi tidak mewakili biaya keduanya
+        if detected or result.source == 'track':
+            self._observe_cost(detected, result.latency_ms)
+            self._adapt()
+        return result
+
+
+def open_source(source):
+    """Angka berarti indeks kamera, selain itu path file video"""
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        raise OSError(f"Tidak bisa membuka sumber video: {source}")
+    return capture
+
+
+def iter_frames(capture, max_frames=None):
+    count = 0
+    while max_frames is None or count < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        count += 1
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='path file video atau indeks kamera (0, 1, ...)')
+    parser.add_argument('--detect-every', type=int, default=10, help='interval deteksi minimum (frame)')
+    parser.add_argument('--window', type=int, default=15, help='panjang jendela smoothing (frame)')
+    parser.add_argument('--budget-ms', type=float, default=40.0)
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--jsonl', action='store_true', help='cetak hasil tiap frame sebagai JSON')
+    parser.add_argument('--output', help='simpan video beranotasi (mp4)')
+    parser.add_argument('--profile', help='nama profil di profiles.json (default: profil aktif)')
+    args = parser.parse_args(argv)
+
+    capture = open_source(args.source)
+    tracker = SkinToneTracker(detect_every=args.detect_every, window=args.window,
+                              budget_ms=args.budget_ms, config=load_config(args.profile))
+    writer = None
+    latencies, sources, labels = [], Counter(), Counter()
+    over_budget = 0
+    try:
+        for frame in iter_frames(capture, args.max_frames):
+            result = tracker.process(frame)
+            latencies.append(result.latency_ms)
+            sources[result.source] += 1
+            labels[result.label] += 1
+            over_budget += result.over_budget
+            if args.jsonl:
+                print(json.dumps(result.to_dict()))
+            if args.output:
+                if writer is None:
+                    fps = capture.get(cv2.CAP_PROP_FPS) or 30
+                    writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*'mp4v'), fps,
+                                             (frame.shape[1], frame.shape[0]))
+                annotated = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                if result.face is not None:
+                    x, y, w, h = result.face
+                    cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                    cv2.putText(annotated, str(result.label), (x, max(0, y - 8)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                writer.write(annotated)
+    finally:
+        capture.release()
+        if writer is not None:
+            writer.release()
+
+    if not latencies:
+        sys.exit('tidak ada frame yang terbaca')
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{len(latencies)} frame, latensi p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {p95:.1f} ms, melewati budget {over_budget}", file=sys.stderr)
+    print(f"sumber kotak: {dict(sources)}", file=sys.stderr)
+    print(f"label: {dict(labels)}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()